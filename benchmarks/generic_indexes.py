@@ -0,0 +1,134 @@
+"""
+Lookup latency on entropy_attribute / entropy_image before and after the
+composite indexes added in entropy/migrations/0002_generic_lookup_indexes.py.
+
+Runs against an on-disk SQLite database using the same schema and the
+same statements the generic relations issue, so it needs no Django setup:
+
+    python benchmarks/generic_indexes.py [rows] [database]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+
+CONTENT_TYPES = 20
+LOOKUPS = 200
+
+SCHEMA = """
+CREATE TABLE entropy_attribute (
+    id integer NOT NULL PRIMARY KEY,
+    content_type_id integer NOT NULL,
+    object_id integer unsigned NOT NULL,
+    name varchar(256) NOT NULL,
+    value varchar(2048) NOT NULL
+);
+CREATE INDEX entropy_attribute_content_type_id ON entropy_attribute (content_type_id);
+CREATE TABLE entropy_image (
+    id integer NOT NULL PRIMARY KEY,
+    content_type_id integer NOT NULL,
+    object_id integer unsigned NOT NULL,
+    image varchar(1024),
+    caption text NOT NULL,
+    is_icon bool NOT NULL,
+    "order" smallint unsigned NOT NULL,
+    _path varchar(1024) NOT NULL,
+    enabled bool NOT NULL
+);
+CREATE INDEX entropy_image_content_type_id ON entropy_image (content_type_id);
+CREATE INDEX entropy_image_enabled ON entropy_image (enabled);
+"""
+
+INDEXES = """
+CREATE INDEX entropy_attribute_content_type_id_object_id_name
+    ON entropy_attribute (content_type_id, object_id, name);
+CREATE INDEX entropy_image_content_type_id_object_id_enabled_order
+    ON entropy_image (content_type_id, object_id, enabled, "order");
+CREATE INDEX entropy_image_is_icon
+    ON entropy_image (content_type_id, object_id) WHERE is_icon;
+ANALYZE;
+"""
+
+QUERIES = (
+    ('attributes', 'SELECT name, value FROM entropy_attribute '
+                   'WHERE content_type_id = ? AND object_id = ?'),
+    ('attribute', 'SELECT value FROM entropy_attribute '
+                  'WHERE content_type_id = ? AND object_id = ? AND name = \'colour\''),
+    ('image_set', 'SELECT id, _path FROM entropy_image '
+                  'WHERE content_type_id = ? AND object_id = ? AND enabled '
+                  'ORDER BY "order"'),
+    ('icon', 'SELECT id, _path FROM entropy_image '
+             'WHERE content_type_id = ? AND object_id = ? AND is_icon'),
+)
+
+
+def populate(cursor, rows):
+    objects = rows // (CONTENT_TYPES * 5)
+    names = ('colour', 'size', 'weight', 'material', 'brand')
+
+    def attributes():
+        for i in range(rows):
+            yield (i % CONTENT_TYPES + 1, i // CONTENT_TYPES % objects,
+                   names[i // (CONTENT_TYPES * objects) % 5], 'value')
+
+    def images():
+        for i in range(rows):
+            yield (i % CONTENT_TYPES + 1, i // CONTENT_TYPES % objects,
+                   '', i % 50 == 0, i // (CONTENT_TYPES * objects),
+                   'images/%d.jpg' % i, i % 7 != 0)
+
+    cursor.executemany(
+        'INSERT INTO entropy_attribute (content_type_id, object_id, name, value) '
+        'VALUES (?, ?, ?, ?)', attributes())
+    cursor.executemany(
+        'INSERT INTO entropy_image (content_type_id, object_id, caption, '
+        'is_icon, "order", _path, enabled) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        images())
+    return objects
+
+
+def run(cursor, objects):
+    rng = random.Random(0)
+    keys = [(rng.randint(1, CONTENT_TYPES), rng.randrange(objects))
+            for i in range(LOOKUPS)]
+    timings = {}
+    for label, sql in QUERIES:
+        started = time.time()
+        for key in keys:
+            cursor.execute(sql, key).fetchall()
+        timings[label] = (time.time() - started) / LOOKUPS * 1000
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    if len(sys.argv) > 2:
+        path = sys.argv[2]
+    else:
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    try:
+        cursor.executescript(SCHEMA)
+        objects = populate(cursor, rows)
+        connection.commit()
+        before = run(cursor, objects)
+        cursor.executescript(INDEXES)
+        after = run(cursor, objects)
+    finally:
+        connection.close()
+        if len(sys.argv) <= 2:
+            os.remove(path)
+
+    print('%d rows per table, %d lookups, ms per lookup' % (rows, LOOKUPS))
+    print('%-12s %10s %10s' % ('query', 'before', 'after'))
+    for label, sql in QUERIES:
+        print('%-12s %10.3f %10.3f' % (label, before[label], after[label]))
+
+
+if __name__ == '__main__':
+    main()
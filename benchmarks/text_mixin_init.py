@@ -0,0 +1,71 @@
+"""
+Queryset iteration cost of TextMixin models, with the per-instance
+``__init__`` hook TextMixin used to have and with the class-level
+``__unicode__`` fallback it installs now:
+
+    python benchmarks/text_mixin_init.py [rows]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'entropy'],
+)
+
+import django
+
+django.setup()
+
+from django.db import connection
+
+from entropy.base import TextMixin
+
+
+class Note(TextMixin):
+    class Meta:
+        app_label = 'entropy'
+
+
+class LegacyNote(TextMixin):
+    class Meta:
+        app_label = 'entropy'
+
+    def __init__(self, *args, **kwargs):
+        # What TextMixin.__init__ used to run for every row
+        if not hasattr(self, '__unicode__'):
+            def _unicode(self):
+                return self.text
+            setattr(self.__class__, '__unicode__', _unicode)
+        super(LegacyNote, self).__init__(*args, **kwargs)
+
+
+REPEAT = 5
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with connection.schema_editor() as editor:
+        editor.create_model(Note)
+        editor.create_model(LegacyNote)
+    for model in (Note, LegacyNote):
+        model.objects.bulk_create(
+            [model(text='Note %d' % i) for i in range(rows)], batch_size=500)
+
+    print('%d rows, best of %d, ms' % (rows, REPEAT))
+    for label, model in (('__init__ hook', LegacyNote), ('class_prepared', Note)):
+        iterate = min(timeit.repeat(
+            lambda: list(model.objects.all()), number=1, repeat=REPEAT))
+        construct = min(timeit.repeat(
+            lambda: [model(id=i, text='') for i in range(rows)], number=1, repeat=REPEAT))
+        print('%-16s iterate %10.1f   construct %10.1f' % (
+            label, iterate * 1000, construct * 1000))
+
+
+if __name__ == '__main__':
+    main()
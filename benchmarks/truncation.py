@@ -0,0 +1,54 @@
+"""
+entropy.text.truncate/truncate_chars against django.utils.text.Truncator
+on a multi-megabyte HTML TextField body:
+
+    python benchmarks/truncation.py [megabytes]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure()
+
+from django.utils.text import Truncator
+
+from entropy.text import truncate, truncate_chars
+
+
+PARAGRAPH = (u'<p>Lorem ipsum <b>dolor</b> sit amet, consectetur adipiscing '
+             u'elit &amp; sed do <a href="#">eiusmod tempor</a> incididunt.</p>\n')
+
+REPEAT = 5
+
+
+def best(statement):
+    return min(timeit.repeat(statement, number=1, repeat=REPEAT)) * 1000
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    text = PARAGRAPH * int(megabytes * 1024 * 1024 / len(PARAGRAPH))
+
+    cases = (
+        ('25 words, html', lambda: Truncator(text).words(25, truncate='...', html=True),
+            lambda: truncate(text, 25)),
+        ('25 words, plain', lambda: Truncator(text).words(25, truncate='...'),
+            lambda: truncate(text, 25)),
+        ('50 chars, html', lambda: Truncator(text).chars(50, truncate='...', html=True),
+            lambda: truncate_chars(text, 50)),
+        ('50 chars, plain', lambda: Truncator(text).chars(50, truncate='...'),
+            lambda: truncate_chars(text, 50)),
+    )
+
+    print('%.1f MB of HTML, best of %d, ms' % (len(text) / 1024.0 / 1024, REPEAT))
+    print('%-18s %12s %12s' % ('case', 'Truncator', 'entropy'))
+    for label, django_case, entropy_case in cases:
+        print('%-18s %12.3f %12.3f' % (label, best(django_case), best(entropy_case)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,28 @@
 import datetime
 import functools
+import operator
+import re
+import time
 
 
 from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.generic import GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.core.cache import caches
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.db.models.signals import class_prepared
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
+from django.utils import six, timezone
+from django.utils.encoding import force_text
 
 
 from ..fields import *
 from .. import settings as entropy_settings
+from ..context import get_current_user
+from ..text import truncate, truncate_chars
 from django.conf import settings
 
 # from ..models import Image
@@ -30,6 +42,153 @@ class GenericMixin(models.Model):
         abstract = True
 
 
+# Keep the number of bound parameters per query under SQLite's limit
+GENERIC_LOOKUP_CHUNK_SIZE = 500
+
+
+def group_by_content_type(objs):
+    '''Return ``{content_type_id: {pk: [obj, ...]}}`` for ``objs``'''
+    grouped = {}
+    for obj in objs:
+        content_type = ContentType.objects.get_for_model(obj)
+        grouped.setdefault(content_type.pk, {}).setdefault(obj.pk, []).append(obj)
+    return grouped
+
+
+def generic_lookups(queryset, content_type_id, object_ids):
+    '''
+    Yield ``queryset`` filtered to ``content_type_id`` and successive
+    chunks of ``object_ids``, for GenericMixin models.
+    '''
+    object_ids = list(object_ids)
+    for i in range(0, len(object_ids), GENERIC_LOOKUP_CHUNK_SIZE):
+        yield queryset.filter(
+            content_type=content_type_id,
+            object_id__in=object_ids[i:i + GENERIC_LOOKUP_CHUNK_SIZE])
+
+
+class BatchLoadQuerySet(QuerySet):
+    '''
+    Runs batch loaders such as ``prefetch_images`` over the results when
+    the queryset is evaluated, for the per-instance caches that
+    ``prefetch_related`` can't fill.
+    '''
+
+    _batch_loaders = ()
+
+    def _batch_load(self, loader, **kwargs):
+        '''Clone that runs ``loader(results, **kwargs)``, replacing any earlier call'''
+        loaders = tuple(
+            (other, other_kwargs) for other, other_kwargs in self._batch_loaders
+            if other is not loader)
+        return self._clone(_batch_loaders=loaders + ((loader, kwargs),))
+
+    def _clone(self, klass=None, setup=False, **kwargs):
+        # values() and friends return other classes, and not instances
+        if klass is None:
+            kwargs.setdefault('_batch_loaders', self._batch_loaders)
+        return super(BatchLoadQuerySet, self)._clone(klass, setup, **kwargs)
+
+    def _fetch_all(self):
+        fetch = self._result_cache is None
+        super(BatchLoadQuerySet, self)._fetch_all()
+        if fetch:
+            for loader, kwargs in self._batch_loaders:
+                loader(self._result_cache, **kwargs)
+
+
+# Versioned cache entries: readers store data under the current version
+# and writers bump it, so a reader racing a writer can only ever store
+# stale data under a version nobody reads again
+
+def _new_cache_version():
+    # Seeded from the clock so a version key that was evicted never comes
+    # back with a number that still has stale data stored under it
+    return int(time.time() * 1000)
+
+
+def get_cache_version(cache, version_key):
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_cache_version(), None)
+        version = cache.get(version_key)
+    return version
+
+
+def bump_cache_version(cache, version_key):
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, _new_cache_version(), None)
+
+
+# Dirty fields
+
+_unloaded = object()
+
+
+class DirtyFieldsMixin(models.Model):
+    '''
+    Opt-in partial saves: loaded field values are snapshotted, and saving
+    an existing row UPDATEs only the columns that changed, plus any
+    ``auto_now`` fields.  The diff is taken in ``save_base``, after every
+    mixin's ``save()`` ran, so fields they set (slugs, ``modified_by``, ...)
+    are part of the update.  An explicit ``update_fields`` always wins.
+
+    Values are compared with ``!=``, so mutate-in-place values are not seen
+    as changed; assign a new value instead.
+    '''
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs):
+        super(DirtyFieldsMixin, self).__init__(*args, **kwargs)
+        self._snapshot_fields()
+
+    def _snapshot_fields(self, names=None):
+        # Deferred fields are missing from __dict__ and never loaded here
+        values = self.__dict__
+        snapshot = dict(
+            (f.attname, values.get(f.attname, _unloaded))
+            for f in self._meta.concrete_fields
+            if not f.primary_key and (names is None or f.name in names or
+                                      f.attname in names))
+        if names is None:
+            self._loaded_values = snapshot
+        else:
+            self._loaded_values.update(snapshot)
+
+    def get_dirty_fields(self):
+        '''Names of the loaded fields changed since load or the last save'''
+        values = self.__dict__
+        return [
+            f.name for f in self._meta.concrete_fields
+            if not f.primary_key and
+            values.get(f.attname, _unloaded) is not _unloaded and
+            self._loaded_values.get(f.attname, _unloaded) != values[f.attname]]
+
+    def is_dirty(self):
+        return bool(self.get_dirty_fields())
+
+    def save_base(self, raw=False, force_insert=False, force_update=False,
+                  using=None, update_fields=None):
+        if (update_fields is None and not raw and not force_insert and
+                not self._state.adding and self.pk is not None):
+            update_fields = set(self.get_dirty_fields())
+            update_fields.update(
+                f.name for f in self._meta.concrete_fields
+                if getattr(f, 'auto_now', False))
+            if not update_fields:
+                # Same as save(update_fields=[]): nothing to write
+                return
+        super(DirtyFieldsMixin, self).save_base(
+            raw=raw, force_insert=force_insert, force_update=force_update,
+            using=using, update_fields=update_fields)
+        self._snapshot_fields(update_fields)
+    save_base.alters_data = True
+
+
 # Text & Content Mixins
 
 class NameMixin(models.Model):
@@ -54,26 +213,54 @@ class NameMixin(models.Model):
 
 
 class TextMixin(models.Model):
+    '''
+    Text mixin.
+
+    Models that don't define ``__unicode__`` (``__str__`` on Python 3)
+    get one returning ``text``, installed once when the class is prepared.
+    '''
 
     text = models.TextField(
         blank=True,
         default='')
 
+    _truncations = None
+
     class Meta:
         abstract = True
 
-    def __init__(self, *args, **kwargs):
-        if not hasattr(self, '__unicode__'):
-            def _unicode(self):
-                return self.text
-            setattr(self.__class__, '__unicode__', _unicode)
-        super(TextMixin, self).__init__(*args, **kwargs)
+    def _truncated(self, function, limit):
+        # Memoized per instance for the current text; a changed text
+        # (different hash) starts afresh
+        text_hash = hash(self.text)
+        if self._truncations is None or self._truncations[0] != text_hash:
+            self._truncations = (text_hash, {})
+        results = self._truncations[1]
+        key = (function.__name__, limit)
+        if key not in results:
+            results[key] = function(self.text, limit)
+        return results[key]
 
     def truncated(self, words=25):
-        return truncate(self.text, words)
+        return self._truncated(truncate, words)
 
     def truncated_chars(self, characters=50):
-        return truncate_chars(self.text, characters)
+        return self._truncated(truncate_chars, characters)
+
+
+def _text_unicode(self):
+    return self.text
+
+
+@receiver(class_prepared)
+def add_text_unicode(sender, **kwargs):
+    if not issubclass(sender, TextMixin):
+        return
+    if six.PY3:
+        if sender.__str__ is models.Model.__str__:
+            sender.__str__ = _text_unicode
+    elif not hasattr(sender, '__unicode__'):
+        sender.__unicode__ = _text_unicode
 
 
 class TitleMixin(models.Model):
@@ -94,6 +281,131 @@ class TitleMixin(models.Model):
         return self.title
 
 
+def free_slugs(slug_prefix, taken, assigned=()):
+    '''
+    Yield ``slug``, ``slug-1``, ``slug-2``... skipping those in ``taken``.
+
+    ``taken`` is any iterable of slugs already in use; only those equal to
+    the prefix or of the form ``prefix-N`` are relevant.  ``assigned`` is a
+    set checked as each slug is yielded, so the caller can keep adding the
+    slugs it hands out under other prefixes.
+    '''
+    suffix = re.compile(r'^%s-([0-9]+)$' % re.escape(slug_prefix))
+    used = set()
+    for slug in taken:
+        if slug == slug_prefix:
+            used.add(0)
+            continue
+        match = suffix.match(slug)
+        if match:
+            used.add(int(match.group(1)))
+    if 0 not in used and slug_prefix not in assigned:
+        yield slug_prefix
+    index = 1
+    while True:
+        slug = '%s-%d' % (slug_prefix, index)
+        if index not in used and slug not in assigned:
+            yield slug
+        index += 1
+
+
+def slug_prefix_q(slug_prefix):
+    '''
+    Q for the slugs ``free_slugs`` cares about: the prefix itself and
+    ``prefix-...``.  An empty prefix (blank or non-ASCII titles) thus
+    matches ``''`` and ``-N`` only, never the whole column.
+    '''
+    return models.Q(slug=slug_prefix) | models.Q(slug__startswith=slug_prefix + '-')
+
+
+def next_free_slug(slug_prefix, taken):
+    '''Return the first of ``slug``, ``slug-1``, ``slug-2``... not in ``taken``.'''
+    return next(free_slugs(slug_prefix, taken))
+
+
+class SlugQuerySet(QuerySet):
+
+    # Keep the number of bound parameters per query under SQLite's limit
+    lookup_chunk_size = 500
+    prefix_chunk_size = 100
+
+    def bulk_create_with_slugs(self, objs, batch_size=None):
+        '''
+        ``bulk_create`` that first assigns slugs the way ``save`` would.
+
+        Slugs are deduplicated within ``objs`` and against the database
+        with at most two lookups (per chunk of distinct slugs): one for
+        exact matches, then a ``prefix`` / ``prefix-...`` lookup for only
+        the prefixes that actually collide.
+        '''
+        objs = list(objs)
+        pending = []
+        batch_slugs = set()
+        for obj in objs:
+            sluggable = None if obj.slug else obj.get_sluggable()
+            if sluggable is None:
+                if obj.slug:
+                    batch_slugs.add(obj.slug)
+            else:
+                pending.append((obj, slugify(sluggable)))
+
+        counts = {}
+        for obj, slug_prefix in pending:
+            counts[slug_prefix] = counts.get(slug_prefix, 0) + 1
+
+        existing = self.model._default_manager.using(self.db)
+        colliding = set(
+            slug_prefix for slug_prefix, count in counts.items()
+            if count > 1 or slug_prefix in batch_slugs
+        )
+        singles = list(set(counts) - colliding)
+        for i in range(0, len(singles), self.lookup_chunk_size):
+            colliding.update(existing.filter(
+                slug__in=singles[i:i + self.lookup_chunk_size]
+            ).values_list('slug', flat=True))
+
+        taken = dict((slug_prefix, set()) for slug_prefix in colliding)
+        colliding = list(colliding)
+        for i in range(0, len(colliding), self.prefix_chunk_size):
+            chunk = colliding[i:i + self.prefix_chunk_size]
+            query = functools.reduce(operator.or_, [
+                slug_prefix_q(slug_prefix) for slug_prefix in chunk])
+            for slug in existing.filter(query).values_list('slug', flat=True):
+                for slug_prefix in chunk:
+                    if slug == slug_prefix or slug.startswith(slug_prefix + '-'):
+                        taken[slug_prefix].add(slug)
+
+        # Prefixes free in the batch and the database are used as they are;
+        # the rest are allocated around them and around each other, since
+        # 'Foo' may allocate 'foo-1' that a 'Foo 1' in the batch slugifies to
+        assigned = set(batch_slugs)
+        for obj, slug_prefix in pending:
+            if slug_prefix not in taken:
+                obj.slug = slug_prefix
+                assigned.add(obj.slug)
+
+        allocators = {}
+        for obj, slug_prefix in pending:
+            if slug_prefix in taken:
+                if slug_prefix not in allocators:
+                    allocators[slug_prefix] = free_slugs(
+                        slug_prefix, taken[slug_prefix], assigned)
+                obj.slug = next(allocators[slug_prefix])
+                assigned.add(obj.slug)
+
+        with transaction.atomic(using=self.db):
+            return self.bulk_create(objs, batch_size=batch_size)
+
+
+class SlugManager(models.Manager):
+    def get_queryset(self):
+        return SlugQuerySet(self.model, using=self._db)
+
+    def bulk_create_with_slugs(self, objs, batch_size=None):
+        '''Assign slugs to ``objs`` and insert them with ``bulk_create``'''
+        return self.get_queryset().bulk_create_with_slugs(objs, batch_size)
+
+
 class BaseSlugMixin(object):
     '''
     SlugMixin works with title or name field provide by
@@ -102,33 +414,55 @@ class BaseSlugMixin(object):
     If neither of those fields exist then the operation passes through
     silently, allowing any other database errors to propagate.
 
+    Allocating a slug costs a single query no matter how many
+    ``slug-N`` collisions exist.  With a unique slug field, a save that
+    loses a race to a concurrent insert is retried with a fresh slug.
+
+    For bulk inserts use ``SlugManager.bulk_create_with_slugs``.
+
     '''
 
+    def get_sluggable(self):
+        sluggable = None
+        if hasattr(self, 'title'):
+            sluggable = getattr(self, 'title', None)
+        if hasattr(self, 'name'):
+            sluggable = getattr(self, 'name', None)
+        return sluggable
 
     def save(self, *args, **kwargs):
+        sluggable = None
         if not self.id and not self.slug:
+            sluggable = self.get_sluggable()
 
-            if hasattr(self, 'title'):
-                sluggable = getattr(self, 'title', None)
-            if hasattr(self, 'name'):
-                sluggable = getattr(self, 'name', None)
+        if sluggable is None:
+            return super(BaseSlugMixin, self).save(*args, **kwargs)
 
-            if sluggable is not None:
-                self.slug = self.slugify_uniquely(sluggable)
-            else:
-                pass
+        if not self._meta.get_field('slug').unique:
+            self.slug = self.slugify_uniquely(sluggable)
+            return super(BaseSlugMixin, self).save(*args, **kwargs)
 
-        super(BaseSlugMixin, self).save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            self.__class__, instance=self)
+        for attempt in range(entropy_settings.SLUG_RETRIES, -1, -1):
+            self.slug = self.slugify_uniquely(sluggable)
+            try:
+                with transaction.atomic(using=using):
+                    return super(BaseSlugMixin, self).save(*args, **kwargs)
+            except IntegrityError:
+                # Only retry when someone else took our slug in the meantime
+                if not attempt or not self.__class__._default_manager.filter(
+                        slug=self.slug).exists():
+                    raise
 
     def slugify_uniquely(self, sluggable):
 
         model = self.__class__
-        slug = slug_prefix = slugify(sluggable)
-        index = 0
-        while model.objects.filter(slug=slug).exists():
-            index += 1
-            slug = slug_prefix + '-' + str(index)
-        return slug
+        slug_prefix = slugify(sluggable)
+        taken = model._default_manager.filter(
+            slug_prefix_q(slug_prefix)
+        ).values_list('slug', flat=True)
+        return next_free_slug(slug_prefix, set(taken))
 
 
 class SlugMixin(BaseSlugMixin, models.Model):
@@ -161,7 +495,51 @@ class MetadataMixin(models.Model):
         abstract = True
 
 
+class AuditQuerySet(QuerySet):
+    '''
+    Keeps CreatedMixin/ModifiedMixin stamps right for bulk operations:
+    ``update()`` sets ``modified_at``/``modified_by`` and ``bulk_create()``
+    fills in ``created_by``/``modified_by`` from the current user, all in
+    the statements Django issues anyway.
+    '''
+
+    def _audit_fields(self):
+        return set(f.name for f in self.model._meta.fields)
+
+    def update(self, **kwargs):
+        fields = self._audit_fields()
+        if 'modified_at' in fields:
+            kwargs.setdefault('modified_at', timezone.now())
+        user = get_current_user()
+        if user is not None and 'modified_by' in fields:
+            kwargs.setdefault('modified_by', user)
+        return super(AuditQuerySet, self).update(**kwargs)
+    update.alters_data = True
+
+    def bulk_create(self, objs, batch_size=None):
+        # created_at/modified_at come from auto_now(_add) as rows are inserted
+        objs = list(objs)
+        user = get_current_user()
+        if user is not None:
+            fields = self._audit_fields()
+            for obj in objs:
+                for name in ('created_by', 'modified_by'):
+                    if name in fields and getattr(obj, name + '_id') is None:
+                        setattr(obj, name, user)
+        return super(AuditQuerySet, self).bulk_create(objs, batch_size)
+
+
+class AuditManager(models.Manager):
+    def get_queryset(self):
+        return AuditQuerySet(self.model, using=self._db)
+
+
 class CreatedMixin(models.Model):
+    '''
+    Creation stamp.  ``created_at`` is set by ``auto_now_add``, and
+    ``created_by`` from the current user (see ``entropy.context``) when it
+    is not given.  Use AuditManager to cover ``bulk_create``.
+    '''
 
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
@@ -174,13 +552,17 @@ class CreatedMixin(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
-        if not self.id:
-            self.created_at = datetime.datetime.now()
-            # self.created_by = request.user # Should this be assigned in admin? (as it depends on 'request')
+        if self._state.adding and self.created_by_id is None:
+            self.created_by = get_current_user()
         super(CreatedMixin, self).save(*args, **kwargs)
 
 
 class ModifiedMixin(models.Model):
+    '''
+    Modification stamp.  ``modified_at`` is set by ``auto_now``, and
+    ``modified_by`` from the current user when there is one.  Use
+    AuditManager to cover ``update()`` and ``bulk_create``.
+    '''
 
     modified_at = models.DateTimeField(auto_now=True)
     modified_by = models.ForeignKey(
@@ -193,13 +575,22 @@ class ModifiedMixin(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
-        if not self.id:
-            self.modified_at = datetime.datetime.now()
-            # self.modified_by = request.user # Should this be assigned in admin?
+        user = get_current_user()
+        if user is not None:
+            self.modified_by = user
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            # Stamp in the same UPDATE, auto_now alone is skipped here;
+            # update_fields=[] stays a no-op
+            extra = ['modified_at'] + (['modified_by'] if user is not None else [])
+            kwargs['update_fields'] = list(set(update_fields) | set(extra))
         super(ModifiedMixin, self).save(*args, **kwargs)
 
 
 class OwnerMixin(models.Model):
+    '''
+    ``owned_by`` defaults to the current user when the object is created.
+    '''
 
     owned_by = models.ForeignKey(
         getattr(settings, 'AUTH_USER_MODEL', 'auth.User'),      # adds support for custom user models in 1.5
@@ -210,17 +601,133 @@ class OwnerMixin(models.Model):
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.owned_by_id is None:
+            self.owned_by = get_current_user()
+        super(OwnerMixin, self).save(*args, **kwargs)
+
 
 # Start & End
 
+def bucketed_now(granularity=None):
+    '''
+    ``timezone.now()`` rounded down to ``granularity`` seconds, by default
+    ``ENTROPY_CURRENT_GRANULARITY``.  Queries built from it stay identical
+    for the whole bucket, so the database and the ``current_ids`` cache
+    can reuse their results.
+    '''
+    now = timezone.now()
+    if granularity is None:
+        granularity = entropy_settings.CURRENT_GRANULARITY
+    if not granularity:
+        return now
+    epoch = datetime.datetime(2000, 1, 1, tzinfo=now.tzinfo)
+    elapsed = now - epoch
+    seconds = elapsed.days * 86400 + elapsed.seconds
+    return epoch + datetime.timedelta(seconds=seconds - seconds % granularity)
+
+
+def _current_cache_version_key(model):
+    opts = model._meta.concrete_model._meta
+    return 'entropy:current:%s.%s:version' % (opts.app_label, opts.model_name)
+
+
+def _get_current_cache():
+    if entropy_settings.CURRENT_CACHE is None:
+        return None
+    return caches[entropy_settings.CURRENT_CACHE]
+
+
+def invalidate_current_cache(model):
+    '''Orphan the cached ``current_ids``/``published_ids`` of ``model``'''
+    cache = _get_current_cache()
+    if cache is None:
+        return
+    bump_cache_version(cache, _current_cache_version_key(model))
+
+
+class StartEndQuerySet(QuerySet):
+    def current_q(self, now=None):
+        '''
+        Q for rows whose start/end bound ``now``; a null end is open ended,
+        as is a null start where the field allows it.
+        '''
+        if now is None:
+            now = bucketed_now()
+        start = models.Q(start__lte=now)
+        if self.model._meta.get_field('start').null:
+            start |= models.Q(start__isnull=True)
+        return start & (models.Q(end__gte=now) | models.Q(end__isnull=True))
+
+    def current(self, now=None):
+        '''Return only models whose start/end bound now'''
+        return self.filter(self.current_q(now))
+
+    def next_boundary(self, now=None):
+        '''
+        The first moment after ``now`` at which a row in this queryset
+        enters or leaves the current set, None if there is none.
+        '''
+        if now is None:
+            now = bucketed_now()
+        boundaries = []
+        next_start = self.filter(start__gt=now).aggregate(
+            next=models.Min('start'))['next']
+        if next_start is not None:
+            boundaries.append(next_start)
+        next_end = self.filter(end__gte=now).aggregate(
+            next=models.Min('end'))['next']
+        if next_end is not None:
+            # A row is still current at its end, and gone just after it
+            boundaries.append(next_end + datetime.timedelta(microseconds=1))
+        return min(boundaries) if boundaries else None
+
+
 class StartEndManager(models.Manager):
-    def current(self):
+    def get_queryset(self):
+        return StartEndQuerySet(self.model, using=self._db)
+
+    def current(self, now=None):
         '''Return only models whose start/end bound now'''
-        now = datetime.datetime.now()
-        return self.get_query_set().filter(
-            start__lte=now,
-            end__gte=now,
-        )
+        return self.get_queryset().current(now)
+
+    def cached_ids(self, name, queryset, boundaries=None, now=None):
+        '''
+        Primary keys of ``queryset``, kept in ``ENTROPY_CURRENT_CACHE`` under
+        ``name`` until the next start/end boundary among ``boundaries`` (by
+        default every row) or until a row of the model is saved or deleted.
+        Without ``ENTROPY_CURRENT_CACHE`` they are queried every time.
+        '''
+        if now is None:
+            now = bucketed_now()
+        cache = _get_current_cache()
+        if cache is None:
+            return list(queryset.values_list('pk', flat=True))
+        version = get_cache_version(cache, _current_cache_version_key(self.model))
+        opts = self.model._meta
+        key = 'entropy:current:%s.%s:%s' % (opts.app_label, opts.model_name, name)
+        cached = cache.get(key, version=version)
+        if cached is not None:
+            ids, since, until = cached
+            if since <= now and (until is None or now < until):
+                return ids
+
+        ids = list(queryset.values_list('pk', flat=True))
+        if boundaries is None:
+            boundaries = self.get_queryset()
+        until = boundaries.next_boundary(now)
+        timeout = None
+        if until is not None:
+            remaining = until - now
+            timeout = max(1, remaining.days * 86400 + remaining.seconds + 1)
+        cache.set(key, (ids, now, until), timeout, version=version)
+        return ids
+
+    def current_ids(self, now=None):
+        '''Cached primary keys of ``current()``'''
+        if now is None:
+            now = bucketed_now()
+        return self.cached_ids('current', self.current(now), now=now)
 
 
 class StartEndBaseMixin(models.Model):
@@ -247,8 +754,12 @@ class StartEndMixin(StartEndBaseMixin):
         blank=True,
         null=True)
 
+    # Merged into concrete models by add_mixin_index_together
     class Meta:
         abstract = True
+        index_together = (
+            ('start', 'end'),
+        )
 
 
 class StartEndBetaMixin(StartEndBaseMixin):
@@ -285,14 +796,27 @@ class PublishingStatusMixin(models.Model):
         abstract = True
 
 
+class EnabledQuerySet(QuerySet):
+    def enabled(self):
+        '''Return only models which are enabled'''
+        return self.filter(enabled=True)
+
+    def disabled(self):
+        '''Return only models which are disabled'''
+        return self.filter(enabled=False)
+
+
 class EnabledManager(models.Manager):
+    def get_queryset(self):
+        return EnabledQuerySet(self.model, using=self._db)
+
     def enabled(self):
         '''Return only models which are enabled'''
-        return self.get_query_set().filter(enabled=True)
+        return self.get_queryset().enabled()
 
     def disabled(self):
         '''Return only models which are disabled'''
-        return self.get_query_set().filter(enabled=False)
+        return self.get_queryset().disabled()
 
 
 class EnabledMixin(models.Model):
@@ -305,25 +829,354 @@ class EnabledMixin(models.Model):
         abstract = True
 
 
-class PublishingManager(models.Manager):
-    def published(self):
-        '''Return only models which are enabled'''
-        return self.get_query_set().filter().enabled().current()
+class PublishingQuerySet(EnabledQuerySet, StartEndQuerySet):
+    def published(self, now=None):
+        '''Return only models which are enabled and current, in one filter'''
+        return self.filter(self.current_q(now), enabled=True)
+
+
+class PublishingManager(EnabledManager, StartEndManager):
+    def get_queryset(self):
+        return PublishingQuerySet(self.model, using=self._db)
+
+    def published(self, now=None):
+        '''Return only models which are enabled and current, in one filter'''
+        return self.get_queryset().published(now)
+
+    def published_ids(self, now=None):
+        '''Cached primary keys of ``published()``'''
+        if now is None:
+            now = bucketed_now()
+        return self.cached_ids(
+            'published', self.published(now), self.enabled(), now=now)
 
 
 class PublishingMixin(StartEndMixin, EnabledMixin):
     '''
     Published Mixin, depends on EnabledMixin, StartEndMixin
+
+    The ``published()`` index in ``Meta.index_together`` replaces
+    StartEndMixin's.
     '''
 
     publish = EnabledField()
 
     class Meta:
         abstract = True
+        index_together = (
+            ('enabled', 'start', 'end'),
+        )
+
+
+@receiver(class_prepared)
+def add_mixin_index_together(sender, **kwargs):
+    '''
+    Django only takes ``Meta`` from a model's first base that has one, so
+    ``class Article(TitleMixin, PublishingMixin)`` would lose the
+    publishing index.  Add the ``index_together`` of every mixin here the
+    model derives from, except where a mixin's subclass in the MRO
+    declares its own.
+    '''
+    opts = sender._meta
+    if opts.proxy or opts.auto_created:
+        return
+    index_together = list(opts.index_together)
+    declared = []
+    for base in sender.__mro__[1:]:
+        if (base.__module__ != __name__ or not issubclass(base, models.Model)
+                or not base._meta.abstract or not base._meta.index_together):
+            continue
+        if any(issubclass(other, base) for other in declared):
+            continue
+        declared.append(base)
+        for fields in base._meta.index_together:
+            if fields not in index_together:
+                index_together.append(fields)
+    opts.index_together = tuple(index_together)
+
+
+def live_state(enabled, start, end, now):
+    '''
+    ``(is_live, next_transition)`` for a row with the given ``enabled``,
+    ``start`` and ``end`` as of ``now``; ``next_transition`` is when the
+    state must be worked out again, None if it never changes by itself.
+    '''
+    if not enabled:
+        return False, None
+    if start is not None and start > now:
+        return False, start
+    if end is None:
+        return True, None
+    if end >= now:
+        # Still live at its end, and gone just after it
+        return True, end + datetime.timedelta(microseconds=1)
+    return False, None
+
+
+class LivePublishingQuerySet(PublishingQuerySet):
+    # Fields live_state depends on
+    live_state_fields = frozenset(['enabled', 'start', 'end'])
+
+    def live(self):
+        '''Return only live models, using the denormalized flag'''
+        return self.filter(is_live=True)
+
+    def due(self, now=None):
+        '''Return only models whose live state needs updating by ``now``'''
+        if now is None:
+            now = timezone.now()
+        return self.filter(next_transition__lte=now)
+
+    def update_live(self, now=None):
+        '''
+        Flip ``is_live`` on the rows that crossed a start/end boundary by
+        ``now``.  Only rows due according to the ``next_transition`` index
+        are read, and rows reaching the same state share one UPDATE.
+        Returns the number of rows updated.
+        '''
+        if now is None:
+            now = timezone.now()
+        return self._write_live_states(self.due(now), now)
+
+    def _write_live_states(self, queryset, now):
+        states = {}
+        for pk, enabled, start, end in queryset.values_list(
+                'pk', 'enabled', 'start', 'end'):
+            states.setdefault(live_state(enabled, start, end, now), []).append(pk)
+
+        updated = 0
+        with transaction.atomic(using=self.db):
+            for (is_live, next_transition), pks in states.items():
+                for i in range(0, len(pks), GENERIC_LOOKUP_CHUNK_SIZE):
+                    updated += self.model._base_manager.using(self.db).filter(
+                        pk__in=pks[i:i + GENERIC_LOOKUP_CHUNK_SIZE]
+                    ).update(is_live=is_live, next_transition=next_transition)
+        return updated
+
+    def update(self, **kwargs):
+        '''
+        As ``QuerySet.update``, working ``is_live`` out again for the rows
+        when ``enabled``, ``start`` or ``end`` change
+        '''
+        if not self.live_state_fields.intersection(kwargs):
+            return super(LivePublishingQuerySet, self).update(**kwargs)
+        with transaction.atomic(using=self.db):
+            # The rows may no longer match the filter once updated
+            pks = list(self.values_list('pk', flat=True))
+            updated = super(LivePublishingQuerySet, self).update(**kwargs)
+            now = timezone.now()
+            for i in range(0, len(pks), GENERIC_LOOKUP_CHUNK_SIZE):
+                self._write_live_states(self.model._base_manager.using(self.db).filter(
+                    pk__in=pks[i:i + GENERIC_LOOKUP_CHUNK_SIZE]), now)
+        return updated
+    update.alters_data = True
+
+    def bulk_create(self, objs, batch_size=None):
+        '''As ``QuerySet.bulk_create``, which skips ``save``, setting ``is_live`` first'''
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.is_live, obj.next_transition = live_state(
+                obj.enabled, obj.start, obj.end, now)
+        return super(LivePublishingQuerySet, self).bulk_create(objs, batch_size)
+
+
+class LivePublishingManager(PublishingManager):
+    def get_queryset(self):
+        return LivePublishingQuerySet(self.model, using=self._db)
+
+    def live(self):
+        '''Return only live models, using the denormalized flag'''
+        return self.get_queryset().live()
+
+    def due(self, now=None):
+        '''Return only models whose live state needs updating by ``now``'''
+        return self.get_queryset().due(now)
+
+    def update_live(self, now=None):
+        '''Flip ``is_live`` on the rows that crossed a start/end boundary'''
+        return self.get_queryset().update_live(now)
+
+
+class LivePublishingMixin(PublishingMixin):
+    '''
+    PublishingMixin with the published state denormalized into ``is_live``,
+    so listings filter on a single indexed boolean instead of the date
+    window.
+
+    ``save``, ``update`` and ``bulk_create`` keep the flag right for edits;
+    the ``publish_scheduled`` management command flips it as rows reach
+    their start or end.
+    '''
+
+    is_live = models.BooleanField(
+        db_index=True,
+        default=False,
+        editable=False)
+
+    next_transition = models.DateTimeField(
+        blank=True,
+        db_index=True,
+        editable=False,
+        null=True)
+
+    class Meta(PublishingMixin.Meta):
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.is_live, self.next_transition = live_state(
+            self.enabled, self.start, self.end, timezone.now())
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            # Write the flag with the fields it is worked out from
+            kwargs['update_fields'] = list(
+                set(update_fields) | set(['is_live', 'next_transition']))
+        super(LivePublishingMixin, self).save(*args, **kwargs)
 
 
 # Functional Mixins
 
+class OrderingQuerySet(QuerySet):
+    '''
+    Writes ``order`` positions in bulk: ``reorder()`` sets a whole sequence
+    with one ``CASE`` UPDATE per batch, ``move()`` slots a single row in
+    between its new neighbours.  Neither sends save signals.
+    '''
+
+    # Three bound parameters per row, under SQLite's limit of 999
+    reorder_batch_size = 300
+
+    def max_order(self, using=None):
+        '''
+        Largest position the ``order`` column holds, None for no limit.
+        The field's nominal range, even on SQLite, which enforces none.
+        '''
+        field = self.model._meta.get_field('order')
+        ranges = connections[using or self.db].ops.integer_field_ranges
+        return ranges.get(field.get_internal_type(), (None, None))[1]
+
+    def reorder(self, pks, scope=None, gap=None, batch_size=None):
+        '''
+        Give the rows ``pks`` the positions ``gap``, ``2 * gap``, ... in that
+        order (``gap`` defaults to 1), restricted to the rows matching
+        ``scope``, a dict of filters such as ``{'object_id': 3}``.  Returns
+        the number of rows updated.
+
+        ``gap`` shrinks as needed to keep the last position within the
+        ``order`` column, e.g. 32767 for ``Image.order``; a ValueError is
+        raised if even a gap of 1 doesn't fit.
+        '''
+        opts = self.model._meta
+        pks = [opts.pk.get_prep_value(pk) for pk in pks]
+        batch_size = batch_size or self.reorder_batch_size
+        queryset = self.filter(**(scope or {}))
+        using = queryset.db
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        order_column = qn(opts.get_field('order').column)
+
+        step = gap or 1
+        max_order = self.max_order(using)
+        if max_order is not None and pks:
+            if len(pks) > max_order:
+                raise ValueError('%d positions do not fit in %s.order' % (
+                    len(pks), opts.object_name))
+            step = min(step, max_order // len(pks))
+        # A scope across relations can't go in a single-table UPDATE:
+        # resolve it to primary keys first
+        joined = queryset.query.count_active_tables() > 1
+
+        updated = 0
+        with transaction.atomic(using=using, savepoint=False):
+            cursor = connection.cursor()
+            for i in range(0, len(pks), batch_size):
+                chunk = pks[i:i + batch_size]
+                rows = queryset.filter(pk__in=chunk)
+                if joined:
+                    rows = self.model._base_manager.using(using).filter(
+                        pk__in=list(rows.values_list('pk', flat=True)))
+                try:
+                    where, where_params = rows.query.get_compiler(using).compile(
+                        rows.query.where)
+                except EmptyResultSet:
+                    # e.g. {'album__in': []}: nothing in scope
+                    continue
+                params = []
+                for position, pk in enumerate(chunk, i + 1):
+                    params.extend((pk, position * step))
+                cursor.execute(
+                    'UPDATE %s SET %s = CASE %s %s ELSE %s END WHERE %s' % (
+                        qn(opts.db_table), order_column, qn(opts.pk.column),
+                        ' '.join(['WHEN %s THEN %s'] * len(chunk)),
+                        order_column, where),
+                    params + list(where_params))
+                updated += cursor.rowcount
+        return updated
+    reorder.alters_data = True
+
+    def move(self, pk, after=None, scope=None, gap=None):
+        '''
+        Move the row ``pk`` right after the row ``after``, or first when
+        ``after`` is None, within ``scope``.  Takes the free position between
+        the new neighbours when there is one, and otherwise renumbers the
+        scope with ``ENTROPY_ORDERING_GAP`` spacing.  Raises the model's
+        DoesNotExist if either row is not in ``scope``.
+        '''
+        opts = self.model._meta
+        prep = opts.pk.get_prep_value
+        pk = prep(pk)
+        if after is not None:
+            after = prep(after)
+            if after == pk:
+                raise ValueError("%s %s can't be moved after itself" % (
+                    opts.object_name, pk))
+        gap = gap or entropy_settings.ORDERING_GAP
+        queryset = self.filter(**(scope or {}))
+        with transaction.atomic(using=queryset.db, savepoint=False):
+            rows = list(queryset.order_by('order', 'pk').values_list('pk', 'order'))
+            pks = [row[0] for row in rows]
+            missing = [
+                value for value in (pk, after)
+                if value is not None and value not in pks]
+            if not missing:
+                rows = [row for row in rows if row[0] != pk]
+                index = 0
+                if after is not None:
+                    index = [row[0] for row in rows].index(after) + 1
+                low = rows[index - 1][1] if index else 0
+                if index < len(rows):
+                    high = rows[index][1]
+                else:
+                    high = low + 2 * gap
+                    max_order = self.max_order(queryset.db)
+                    if max_order is not None:
+                        high = min(high, max_order + 1)
+                if high - low > 1:
+                    return queryset.filter(pk=pk).update(order=(low + high) // 2)
+                pks = [row[0] for row in rows]
+                pks.insert(index, pk)
+                return queryset.reorder(pks, gap=gap)
+        # Raised outside the block, which would otherwise spoil the
+        # caller's transaction
+        raise self.model.DoesNotExist('%s %s is not in the scope %r' % (
+            opts.object_name, missing[0], scope))
+    move.alters_data = True
+
+
+class OrderingManager(models.Manager):
+    def get_queryset(self):
+        return OrderingQuerySet(self.model, using=self._db)
+
+    def reorder(self, pks, scope=None, gap=None, batch_size=None):
+        return self.get_queryset().reorder(pks, scope, gap, batch_size)
+
+    def move(self, pk, after=None, scope=None, gap=None):
+        return self.get_queryset().move(pk, after, scope, gap)
+
+    def max_order(self, using=None):
+        return self.get_queryset().max_order(using)
+
+
 class OrderingMixin(models.Model):
 
     order = models.PositiveIntegerField(
@@ -358,6 +1211,43 @@ class PriorityMixin(models.Model):
 # Images
 
 
+def prefetch_images(objs, enabled_only=True):
+    '''
+    Load the Images of every ImageMixin instance in ``objs`` with one query
+    per content type, so ``image``, ``images`` and ``icon`` need no further
+    queries.
+    '''
+    from ..models import Image
+
+    queryset = Image.objects.order_by('order')
+    if enabled_only:
+        queryset = queryset.filter(enabled=True)
+
+    for content_type_id, instances in group_by_content_type(objs).items():
+        images = dict((pk, []) for pk in instances)
+        for rows in generic_lookups(queryset, content_type_id, instances):
+            for image in rows:
+                images[image.object_id].append(image)
+        for pk, same in instances.items():
+            for obj in same:
+                obj._image_cache = images[pk]
+
+
+class ImageQuerySet(BatchLoadQuerySet):
+    def prefetch_images(self, enabled_only=True):
+        '''Batch load the Images of every object when evaluated'''
+        return self._batch_load(prefetch_images, enabled_only=enabled_only)
+
+
+class ImageManager(models.Manager):
+    def get_queryset(self):
+        return ImageQuerySet(self.model, using=self._db)
+
+    def prefetch_images(self, enabled_only=True):
+        '''Batch load the Images of every object when evaluated'''
+        return self.get_queryset().prefetch_images(enabled_only)
+
+
 class ImageMixin(models.Model):
     '''
     Super neat ImageMixin model.
@@ -365,11 +1255,16 @@ class ImageMixin(models.Model):
     Apply this to the model that the Image model is relating
     to via gfk.
 
-    The images will be available via:
+    The enabled images are fetched once, in order, and kept on the
+    instance; everything below is derived from that list:
 
-        parent_obj.image -- the first image object, no queries
-        parent_obj.images -- the queryset -- one query which is saved as self._queryset for future use
+        parent_obj.image -- the first image object
+        parent_obj.images -- the remaining images
+        parent_obj.icons -- the images marked as icons
+        parent_obj.icon -- the first icon
 
+    List pages can load the images of every object up front with
+    ``ImageManager.prefetch_images()`` or ``prefetch_images()``.
 
     In templates with Sorl
 
@@ -384,22 +1279,42 @@ class ImageMixin(models.Model):
         {% endthumbnail %}
     {% endfor %}
     {% endwith %}
+
+    Or, with ENTROPY_IMAGE_RENDITIONS configured, without any image
+    processing at render time
+
+    <img src="{{ parent_obj.image.rendition_urls.thumb }}">
     '''
     image_set = GenericRelation('entropy.Image')
 
+    _image_cache = None
+
     class Meta:
         abstract = True
 
+    def _images(self):
+        if self._image_cache is None:
+            self._image_cache = list(self.image_set.filter(enabled=True))
+        return self._image_cache
+
+    def clear_image_cache(self):
+        '''Forget the fetched images, e.g. after attaching new ones'''
+        self._image_cache = None
+
     @property
     def image(self):
         try:
-            return self.image_set.all()[0]
+            return self._images()[0]
         except IndexError:
             return None
 
     @property
     def images(self):
-        return self.image_set.all()[1:]
+        return self._images()[1:]
+
+    @property
+    def icons(self):
+        return [image for image in self._images() if image.is_icon]
 
     @property
     def icon(self):
@@ -408,13 +1323,6 @@ class ImageMixin(models.Model):
         except IndexError:
             return None
 
-    # # @buffered_property
-    # def icons(self):
-    #     return list(Image.objects.filter(
-    #         content_type=ContentType.objects.get_for_model(self),
-    #         object_id=self.id,
-    #         is_icon=True
-    #     ))
 
 class BaseLinkMixin(models.Model):
 
@@ -426,10 +1334,130 @@ class BaseLinkMixin(models.Model):
         abstract = True
 
 
+def _get_link_url_cache():
+    if entropy_settings.LINK_URL_CACHE is None:
+        return None
+    return caches[entropy_settings.LINK_URL_CACHE]
+
+
+def _link_url_cache_keys(content_type_id, object_id):
+    key = 'entropy:link_url:%s:%s' % (content_type_id, object_id)
+    return key + ':version', key
+
+
+def invalidate_link_url_cache(content_type_id, object_id):
+    '''Orphan any cached URL of links to the given object'''
+    cache = _get_link_url_cache()
+    if cache is None:
+        return
+    version_key, key = _link_url_cache_keys(content_type_id, object_id)
+    bump_cache_version(cache, version_key)
+
+
+def _cached_link_urls(cache, targets):
+    '''
+    ``({target: (url,)}, {target: key})`` for ``targets``, a list of
+    ``(content_type_id, object_id)``: the URLs found in ``cache`` and the
+    keys to store the missing ones under.
+    '''
+    cache_keys = dict(
+        (target, _link_url_cache_keys(*target)) for target in targets)
+    versions = cache.get_many([keys[0] for keys in cache_keys.values()])
+    keys = {}
+    for target, (version_key, key) in cache_keys.items():
+        version = versions.get(version_key)
+        if version is None:
+            version = get_cache_version(cache, version_key)
+        keys[target] = '%s:%s' % (key, version)
+    found = cache.get_many(list(keys.values()))
+    urls = dict(
+        (target, found[key]) for target, key in keys.items() if key in found)
+    return urls, keys
+
+
+def _resolve_link_url(target):
+    try:
+        return target.get_absolute_url()
+    except AttributeError:
+        return None
+
+
+def prefetch_links(objs):
+    '''
+    Resolve the URLs of every LinkURLMixin instance in ``objs`` that has
+    no ``url`` of its own: cached ones come from ``ENTROPY_LINK_URL_CACHE``
+    in one round trip and the linked objects of the rest are loaded with
+    one query per content type, so ``get_absolute_url()`` and
+    ``content_object`` need no further queries.
+    '''
+    links = {}
+    for obj in objs:
+        if not obj.url and obj.content_type_id and obj.object_id:
+            links.setdefault(
+                (obj.content_type_id, obj.object_id), []).append(obj)
+    if not links:
+        return
+
+    cache = _get_link_url_cache()
+    urls, keys = {}, {}
+    if cache is not None:
+        urls, keys = _cached_link_urls(cache, list(links))
+
+    missing = {}
+    for content_type_id, object_id in links:
+        if (content_type_id, object_id) not in urls:
+            missing.setdefault(content_type_id, []).append(object_id)
+
+    resolved = {}
+    for content_type_id, object_ids in missing.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        targets = {}
+        # The links of a stale content type, with no model, resolve to None
+        if model is not None:
+            for i in range(0, len(object_ids), GENERIC_LOOKUP_CHUNK_SIZE):
+                targets.update(model._base_manager.in_bulk(
+                    object_ids[i:i + GENERIC_LOOKUP_CHUNK_SIZE]))
+        for object_id in object_ids:
+            link = (content_type_id, object_id)
+            target = targets.get(object_id)
+            urls[link] = (_resolve_link_url(target),)
+            if cache is not None:
+                resolved[keys[link]] = urls[link]
+            for obj in links[link]:
+                setattr(obj, BaseLinkMixin.content_object.cache_attr, target)
+
+    if resolved:
+        cache.set_many(resolved, entropy_settings.LINK_URL_CACHE_TIMEOUT)
+
+    for link, same in links.items():
+        for obj in same:
+            obj._link_url = (link, urls[link][0])
+
+
+class LinkQuerySet(BatchLoadQuerySet):
+    def prefetch_links(self):
+        '''Batch resolve the links of every object when evaluated'''
+        return self._batch_load(prefetch_links)
+
+
+class LinkManager(models.Manager):
+    def get_queryset(self):
+        return LinkQuerySet(self.model, using=self._db)
+
+    def prefetch_links(self):
+        '''Batch resolve the links of every object when evaluated'''
+        return self.get_queryset().prefetch_links()
+
+
 class LinkURLMixin(BaseLinkMixin):
     '''
     Class for generating get_absolute_url from either the
     linked object, or the overriding url field
+
+    The linked object's URL is resolved once per instance and, if
+    ``ENTROPY_LINK_URL_CACHE`` names a cache alias, shared across requests
+    until the linked object is saved or deleted.  Menus should load their
+    items with ``LinkManager.prefetch_links()`` or ``prefetch_links()``.
     '''
 
     content_type = models.ForeignKey(
@@ -446,17 +1474,22 @@ class LinkURLMixin(BaseLinkMixin):
         help_text="Optionally, override and link to an arbitrary URL",
         max_length=1024)
 
+    # ((content_type_id, object_id), url) as last resolved
+    _link_url = None
+
     class Meta:
         abstract = True
 
     def get_absolute_url(self):
         if self.url:
             return self.url
-        else:
-            try:
-                return self.content_object.get_absolute_url()
-            except AttributeError:
-                return None
+        target = (self.content_type_id, self.object_id)
+        if self._link_url is None or self._link_url[0] != target:
+            if self.content_type_id and self.object_id:
+                prefetch_links([self])
+            else:
+                self._link_url = (target, None)
+        return self._link_url[1]
 
     def clean(self):
         if self.content_object and self == self.content_object:
@@ -464,31 +1497,185 @@ class LinkURLMixin(BaseLinkMixin):
             raise ValidationError("An object should not link to itself.")
 
 
+def _get_attribute_cache():
+    if entropy_settings.ATTRIBUTE_CACHE is None:
+        return None
+    return caches[entropy_settings.ATTRIBUTE_CACHE]
+
+
+def _attribute_cache_keys(content_type_id, object_id):
+    key = 'entropy:attributes:%s:%s' % (content_type_id, object_id)
+    return key + ':version', key
+
+
+def invalidate_attribute_cache(content_type_id, object_id):
+    '''Orphan any cached attribute dict for the given object'''
+    cache = _get_attribute_cache()
+    if cache is None:
+        return
+    version_key, key = _attribute_cache_keys(content_type_id, object_id)
+    bump_cache_version(cache, version_key)
+
+
+def prefetch_attributes(objs, names=None):
+    '''
+    Load the Attributes of every AttributeMixin instance in ``objs`` with
+    one query per content type, so ``obj[name]`` needs no further queries.
+
+    If ``names`` is given only those Attributes are loaded; reading any
+    other name falls back to loading the object's full set.
+    '''
+    from ..models import Attribute
+
+    queryset = Attribute.objects.all()
+    if names is not None:
+        queryset = queryset.filter(name__in=names)
+
+    for content_type_id, instances in group_by_content_type(objs).items():
+        attributes = dict((pk, {}) for pk in instances)
+        for rows in generic_lookups(queryset, content_type_id, instances):
+            for object_id, name, value in rows.values_list(
+                    'object_id', 'name', 'value'):
+                attributes[object_id][name] = value
+        for pk, same in instances.items():
+            for obj in same:
+                obj._attribute_cache = attributes[pk]
+                obj._attribute_names = None if names is None else set(names)
+
+
+class AttributeQuerySet(BatchLoadQuerySet):
+    def with_attributes(self, names=None):
+        '''Batch load the Attributes of every object when evaluated'''
+        return self._batch_load(prefetch_attributes, names=names)
+
+
+class AttributeManager(models.Manager):
+    def get_queryset(self):
+        return AttributeQuerySet(self.model, using=self._db)
+
+    def with_attributes(self, names=None):
+        '''Batch load the Attributes of every object when evaluated'''
+        return self.get_queryset().with_attributes(names)
+
+
 class AttributeMixin(models.Model):
-    '''Mixin to give dict access to generic Attributes'''
-    attributes = generic.GenericRelation('Attribute')
+    '''
+    Mixin to give dict access to generic Attributes
+
+    The attributes are loaded once per instance and kept up to date by
+    ``__setitem__``.  If ``ENTROPY_ATTRIBUTE_CACHE`` names a cache alias
+    they are also shared across requests, keyed on the object's content
+    type and id and invalidated whenever an Attribute is saved or deleted.
+
+    To load the attributes of a whole list at once use
+    ``AttributeManager.with_attributes()`` or ``prefetch_attributes()``.
+    '''
+    attributes = generic.GenericRelation('entropy.Attribute')
+
+    _attribute_cache = None
+    # Names loaded by prefetch_attributes(names=...), None when all are
+    _attribute_names = None
 
     class Meta:
         abstract = True
 
+    def _load_attributes(self):
+        cache = _get_attribute_cache()
+        if cache is None:
+            return dict(self.attributes.values_list('name', 'value'))
+
+        content_type = ContentType.objects.get_for_model(self)
+        version_key, key = _attribute_cache_keys(content_type.pk, self.pk)
+        version = get_cache_version(cache, version_key)
+        attributes = cache.get(key, version=version)
+        if attributes is None:
+            attributes = dict(self.attributes.values_list('name', 'value'))
+            cache.set(key, attributes,
+                entropy_settings.ATTRIBUTE_CACHE_TIMEOUT, version=version)
+        return attributes
+
     def _attributes(self):
-        return dict(
-            self.attributes.values_list('name', 'value')
-        )
+        if self._attribute_cache is None:
+            self._attribute_cache = self._load_attributes()
+        return self._attribute_cache
 
     def __getitem__(self, key):
         try:
             return getattr(self, key)
         except AttributeError:
-            return self._attributes()[key]
+            attributes = self._attributes()
+            if (key not in attributes and self._attribute_names is not None
+                    and key not in self._attribute_names):
+                # Only some names were prefetched, so load the lot
+                self._attribute_cache = self._attribute_names = None
+                attributes = self._attributes()
+            return attributes[key]
 
     def __setitem__(self, key, value):
-        from .models import Attribute
-        try:
-            attr = self.attributes.get(name=key)
-        except Attribute.DoesNotExist:
-            attr = Attribute(name=key, content_object=self)
-        attr.value = value
-        attr.save()
-
-        del self._attributes
+        self.set_attributes({key: value})
+
+    def set_attributes(self, values, batch_size=None):
+        '''Set several Attributes at once, see ``bulk_set_attributes``'''
+        self.bulk_set_attributes({self: values}, batch_size)
+
+    @classmethod
+    def bulk_set_attributes(cls, values, batch_size=None):
+        '''
+        Upsert Attributes for many objects, given as ``{obj: {name: value}}``.
+
+        The existing rows are read once per content type, new names are
+        inserted with ``bulk_create`` and changed values are written with
+        one UPDATE per distinct value; unchanged values are skipped.  All
+        of it happens in a single transaction.
+        '''
+        from ..models import Attribute
+
+        chunk_size = GENERIC_LOOKUP_CHUNK_SIZE
+        changed = []
+        with transaction.atomic(using=router.db_for_write(Attribute)):
+            for content_type_id, instances in group_by_content_type(values).items():
+                current = dict((pk, {}) for pk in instances)
+                for rows in generic_lookups(
+                        Attribute.objects.all(), content_type_id, instances):
+                    for pk, object_id, name, value in rows.values_list(
+                            'pk', 'object_id', 'name', 'value'):
+                        current[object_id][name] = (pk, value)
+
+                to_create = []
+                to_update = {}
+                for object_id, same in instances.items():
+                    attributes = {}
+                    for obj in same:
+                        attributes.update(values[obj])
+                    existing = current[object_id]
+                    dirty = False
+                    for name, value in attributes.items():
+                        value = force_text(value)
+                        if name not in existing:
+                            to_create.append(Attribute(
+                                content_type_id=content_type_id,
+                                object_id=object_id,
+                                name=name,
+                                value=value))
+                        elif existing[name][1] != value:
+                            to_update.setdefault(value, []).append(existing[name][0])
+                        else:
+                            continue
+                        existing[name] = (None, value)
+                        dirty = True
+                    for obj in same:
+                        obj._attribute_cache = dict(
+                            (name, value) for name, (pk, value) in existing.items())
+                        obj._attribute_names = None
+                    if dirty:
+                        changed.append((content_type_id, object_id))
+
+                Attribute.objects.bulk_create(to_create, batch_size)
+                for value, pks in to_update.items():
+                    for i in range(0, len(pks), chunk_size):
+                        Attribute.objects.filter(
+                            pk__in=pks[i:i + chunk_size]).update(value=value)
+
+        # bulk_create and update send no signals, so invalidate by hand
+        for content_type_id, object_id in changed:
+            invalidate_attribute_cache(content_type_id, object_id)
@@ -1,4 +1,4 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 from django.utils.importlib import import_module
 
 
@@ -8,4 +8,6 @@ class EntropyConfig(AppConfig):
 
     def ready(self):
         # import_module('images.collections')
-        pass
+        from .models import connect_link_url_invalidation
+        for model in apps.get_models():
+            connect_link_url_invalidation(model)
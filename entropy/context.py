@@ -0,0 +1,57 @@
+try:
+    from contextvars import ContextVar
+except ImportError:     # Python 2, fall back to per-thread state
+    ContextVar = None
+import threading
+from contextlib import contextmanager
+
+
+if ContextVar is not None:
+    _user = ContextVar('entropy_current_user', default=None)
+else:
+    class _ThreadVar(threading.local):
+        value = None
+
+        def get(self):
+            return self.value
+
+        def set(self, value):
+            token, self.value = self.value, value
+            return token
+
+        def reset(self, token):
+            self.value = token
+
+    _user = _ThreadVar()
+
+
+def get_current_user():
+    '''
+    The user on whose behalf the current code runs, or None when there
+    is none or it is anonymous.  Set per request by CurrentUserMiddleware;
+    the lazy ``request.user`` is only resolved here, on first use.
+    '''
+    user = _user.get()
+    if user is None or not user.is_authenticated():
+        return None
+    return user
+
+
+def set_current_user(user):
+    '''Set the current user, returning a token for ``reset_current_user``'''
+    return _user.set(user)
+
+
+def reset_current_user(token):
+    '''Restore the current user from before ``set_current_user``'''
+    _user.reset(token)
+
+
+@contextmanager
+def current_user(user):
+    '''Run a block as ``user``, e.g. in management commands or tasks'''
+    token = set_current_user(user)
+    try:
+        yield user
+    finally:
+        reset_current_user(token)
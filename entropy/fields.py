@@ -4,6 +4,7 @@ import functools
 
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
+from django.utils import timezone
 
 
 from .settings import USE_FILEBROWSER
@@ -47,7 +48,7 @@ SlugField = functools.partial(
 
 AutoDateTimeField = functools.partial(
     models.DateTimeField,
-    default=datetime.datetime.now)
+    default=timezone.now)
 
 AutoDateField = functools.partial(
     models.DateField,
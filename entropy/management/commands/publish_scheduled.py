@@ -0,0 +1,40 @@
+import time
+from optparse import make_option
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from entropy.base import LivePublishingMixin, LivePublishingQuerySet
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--loop', action='store_true', dest='loop', default=False,
+            help='Keep running, updating every --interval seconds.'),
+        make_option('--interval', action='store', dest='interval', type='int',
+            default=60, help='Seconds between updates with --loop. Defaults to 60.'),
+        make_option('--database', action='store', dest='database',
+            default=DEFAULT_DB_ALIAS, help='Nominates a database to update. '
+                'Defaults to the "default" database.'),
+    )
+    help = "Flips is_live on LivePublishingMixin models whose start or end has passed."
+
+    def handle(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        live_models = [
+            model for model in apps.get_models()
+            if issubclass(model, LivePublishingMixin)
+        ]
+        while True:
+            now = timezone.now()
+            for model in live_models:
+                queryset = LivePublishingQuerySet(model, using=options['database'])
+                updated = queryset.update_live(now)
+                if verbosity >= 2 or (updated and verbosity >= 1):
+                    self.stdout.write("%s: %d row(s) updated" % (
+                        model._meta.object_name, updated))
+            if not options.get('loop'):
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from entropy.models import Image
+from entropy.renditions import render_task
+from entropy import settings as entropy_settings
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--since', action='store', dest='since', default=None,
+            help='Also re-render images last rendered before this date/time, '
+                'e.g. the time of a deploy that changed ENTROPY_IMAGE_RENDITIONS. '
+                'By default only images that were never rendered are processed.'),
+        make_option('--processes', action='store', dest='processes', type='int',
+            default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.'),
+    )
+    help = "Generates the ENTROPY_IMAGE_RENDITIONS of entropy.Image files."
+
+    def handle(self, **options):
+        if not entropy_settings.IMAGE_RENDITIONS:
+            raise CommandError("ENTROPY_IMAGE_RENDITIONS is empty, there is nothing to render.")
+
+        pending = Q(rendered_at__isnull=True)
+        if options.get('since'):
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError("--since must be a date/time, e.g. 2014-05-01T12:00")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, timezone.get_current_timezone())
+            pending |= Q(rendered_at__lt=since)
+
+        tasks = list(Image.objects.filter(pending).exclude(image='').exclude(
+            image__isnull=True).values_list('pk', 'image'))
+        verbosity = int(options.get('verbosity', 1))
+        if verbosity >= 1:
+            self.stdout.write("Rendering %d image(s)" % len(tasks))
+
+        pool = None
+        processes = max(1, options.get('processes') or 1)
+        if processes == 1 or len(tasks) < 2:
+            results = (render_task(task) for task in tasks)
+        else:
+            # Don't share database connections with the forked workers;
+            # they only talk to storage
+            for connection in connections.all():
+                connection.close()
+            pool = multiprocessing.Pool(processes)
+            results = pool.imap_unordered(render_task, tasks)
+
+        failed = 0
+        for pk, renditions, error in results:
+            if error:
+                failed += 1
+                self.stderr.write("Image %s: %s" % (pk, error))
+                continue
+            Image.objects.filter(pk=pk).update(
+                _renditions=json.dumps(renditions),
+                rendered_at=timezone.now())
+            if verbosity >= 2:
+                self.stdout.write("Rendered image %s" % pk)
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if verbosity >= 1:
+            self.stdout.write("Rendered %d image(s), %d failed" % (len(tasks) - failed, failed))
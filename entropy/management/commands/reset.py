@@ -1,63 +1,233 @@
+import functools
+import itertools
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from optparse import make_option
 
 from django.conf import settings
 from django.core.management.base import AppCommand, CommandError
 from django.core.management.color import no_style
-from entropy.management.sql import sql_reset
-from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.utils import six
+from entropy.management.snapshots import (
+    restore_snapshot, save_snapshot, snapshot_key)
+from entropy.management.sql import (
+    app_table_names, dependency_order, iter_sql_all, sql_delete, sql_truncate)
+from django.db import connections, models, transaction, DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def timed(timings, name):
+    start = time.time()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.time() - start
+
 
 class Command(AppCommand):
     option_list = AppCommand.option_list + (
         make_option('--noinput', action='store_false', dest='interactive', default=True,
             help='Tells Django to NOT prompt the user for input of any kind.'),
-        make_option('--database', action='store', dest='database',
-            default=DEFAULT_DB_ALIAS, help='Nominates a database to reset. '
-                'Defaults to the "default" database.'),
+        make_option('--database', action='append', dest='database',
+            default=None, help='Nominates a database to reset. '
+                'Defaults to the "default" database. Repeat it, or separate '
+                'aliases with commas, to reset several databases in parallel.'),
+        make_option('--fast', action='store_true', dest='fast', default=False,
+            help='Empty the existing tables in one transaction, with a single '
+                'TRUNCATE on PostgreSQL or one script on SQLite, instead of '
+                'dropping and recreating them.'),
+        make_option('--emit', action='store', dest='emit', default=None,
+            help='Write the reset script to this file, e.g. for psql -f, '
+                'instead of running it. With several databases the alias is '
+                'appended to the file name.'),
+        make_option('--snapshot', action='store', dest='snapshot', default=None,
+            type='choice', choices=['save', 'restore'],
+            help='"save" snapshots the whole database as it is now, e.g. after '
+                'a reset and loaddata, without resetting anything. "restore" '
+                'brings back the snapshot taken with the same schema instead '
+                'of running any DDL, and falls back to a normal reset when '
+                'there is none. PostgreSQL and SQLite only.'),
+        make_option('--batch-size', action='store', dest='batch_size', type='int',
+            default=100, help='How many statements to send per round trip '
+                'where the backend accepts several at once (PostgreSQL). '
+                'Defaults to 100.'),
     )
-    help = "Executes ``sqlreset`` for the given app(s) in the current database."
+    help = "Executes ``sqlreset`` for the given app(s) in the given database(s)."
     args = '[appname ...]'
 
     output_transaction = True
 
-    def handle_app(self, app, **options):
+    def execute_sql(self, connection, sql_list, script=False, batch_size=1):
+        if script and connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            # A single round trip; executescript() commits anything pending
+            # first, so the script brings its own transaction
+            connection.ensure_connection()
+            raw = connection.connection
+            try:
+                raw.executescript('BEGIN;\n%s\nCOMMIT;' % '\n'.join(sql_list))
+            except Exception:
+                try:
+                    raw.execute('ROLLBACK')
+                except connection.Database.Error:
+                    pass
+                raise
+            return
+        if connection.vendor != 'postgresql':
+            batch_size = 1
+        sql_list = iter(sql_list)
+        with transaction.atomic(using=connection.alias):
+            cursor = connection.cursor()
+            while True:
+                batch = list(itertools.islice(sql_list, batch_size))
+                if not batch:
+                    break
+                cursor.execute('\n'.join(batch))
+
+    def reset_database(self, using, apps, fast=False, verbosity=1, emit=None, snapshot=None,
+                       batch_size=1):
+        """
+        Resets the given apps, in dependency order, in one transaction on
+        the database ``using``, or writes the script to ``emit``, or saves
+        or restores a snapshot. Returns the time spent in each phase.
+        """
+        connection = connections[using]
+        timings = {}
+
+        if snapshot:
+            with timed(timings, 'snapshot'):
+                key = snapshot_key(apps, self.style, connection)
+                if snapshot == 'save':
+                    name = save_snapshot(connection, key)
+                else:
+                    restored = restore_snapshot(connection, key)
+            if snapshot == 'save':
+                if verbosity >= 1:
+                    print "Saved snapshot %s of %s." % (name, using)
+                return timings
+            if restored:
+                return timings
+            if verbosity >= 1:
+                print "No snapshot of the current schema in %s, resetting." % using
+
+        if fast:
+            with timed(timings, 'introspect'):
+                tables = dict((app, app_table_names(app, connection)) for app in apps)
+            missing = [app for app in apps if tables[app][1]]
+            if missing:
+                # Only a full reset creates tables
+                if verbosity >= 1:
+                    print "Tables missing for %s in %s, doing a full reset." % (
+                        ', '.join(self.app_name(app) for app in missing), using)
+                fast = False
+
+        with timed(timings, 'generate'):
+            sql_list = []
+            if fast:
+                for app in reversed(apps):
+                    sql_list.extend(sql_truncate(app, self.style, connection, tables[app][0]))
+            else:
+                # Drop referencing apps first, create referenced apps first;
+                # custom SQL files are streamed as the statements execute
+                for app in reversed(apps):
+                    sql_list.extend(sql_delete(app, self.style, connection, close_connection=False))
+                sql_list = itertools.chain(sql_list, *[
+                    iter_sql_all(app, self.style, connection) for app in apps])
+
+        if emit:
+            with timed(timings, 'emit'):
+                with open(emit, 'w') as fp:
+                    fp.write('BEGIN;\n')
+                    for sql in sql_list:
+                        fp.write(sql.encode('utf-8') + '\n')
+                    fp.write('COMMIT;\n')
+            return timings
+
+        try:
+            with timed(timings, 'execute'):
+                self.execute_sql(connection, sql_list, script=fast, batch_size=batch_size)
+        except Exception, e:
+            names = ' '.join(self.app_name(app) for app in apps)
+            raise CommandError("""Error: %s couldn't be reset in %s. Possible reasons:
+  * The database isn't running or isn't configured correctly.
+  * At least one of the database tables doesn't exist.
+  * The SQL was invalid.
+Hint: Look at the output of 'django-admin.py sqlreset %s'. That's the SQL this command wasn't able to run.
+The full error: %s""" % (names, using, names, e))
+        return timings
+
+    def reset_in_thread(self, target, **kwargs):
+        # Connections are per thread, so each worker opens its own
+        using, emit = target
+        try:
+            return self.reset_database(using, emit=emit, **kwargs)
+        finally:
+            connections[using].close()
+
+    def app_name(self, app):
+        return app.__name__.split('.')[-2]
+
+    def handle(self, *app_labels, **options):
         # This command breaks a lot and should be deprecated
         import warnings
         warnings.warn(
             'This command has been deprecated. The command ``flush`` can be used to delete everything. You can also use ALTER TABLE or DROP TABLE statements manually.',
             PendingDeprecationWarning
         )
-        using = options.get('database', DEFAULT_DB_ALIAS)
-        connection = connections[using]
+        if not app_labels:
+            raise CommandError('Enter at least one appname.')
+        apps = dependency_order([models.get_app(label) for label in app_labels])
 
-        app_name = app.__name__.split('.')[-2]
-        self.style = no_style()
+        databases = options.get('database') or [DEFAULT_DB_ALIAS]
+        if isinstance(databases, six.string_types):
+            databases = [databases]
+        aliases = []
+        for value in databases:
+            for alias in value.split(','):
+                if alias and alias not in aliases:
+                    aliases.append(alias)
 
-        sql_list = sql_reset(app, self.style, connection)
+        verbosity = int(options.get('verbosity', 1))
+        self.style = no_style()
+        app_names = ', '.join(self.app_name(app) for app in apps)
 
-        if options.get('interactive'):
+        emit = options.get('emit')
+        snapshot = options.get('snapshot')
+        if emit and snapshot:
+            raise CommandError('--emit and --snapshot cannot be combined.')
+        if options.get('interactive') and not emit and snapshot != 'save':
             confirm = raw_input("""
 You have requested a database reset.
 This will IRREVERSIBLY DESTROY any data for
-the "%s" application in the database "%s".
+the "%s" application(s) in the database(s) "%s".
 Are you sure you want to do this?
 
-Type 'yes' to continue, or 'no' to cancel: """ % (app_name, connection.settings_dict['NAME']))
+Type 'yes' to continue, or 'no' to cancel: """ % (app_names, ', '.join(
+                connections[alias].settings_dict['NAME'] for alias in aliases)))
         else:
             confirm = 'yes'
 
-        if confirm == 'yes':
-            try:
-                cursor = connection.cursor()
-                for sql in sql_list:
-                    cursor.execute(sql)
-            except Exception, e:
-                transaction.rollback_unless_managed()
-                raise CommandError("""Error: %s couldn't be reset. Possible reasons:
-  * The database isn't running or isn't configured correctly.
-  * At least one of the database tables doesn't exist.
-  * The SQL was invalid.
-Hint: Look at the output of 'django-admin.py sqlreset %s'. That's the SQL this command wasn't able to run.
-The full error: %s""" % (app_name, app_name, e))
-            transaction.commit_unless_managed()
-        else:
+        if confirm != 'yes':
             print "Reset cancelled."
+            return
+
+        kwargs = {'apps': apps, 'fast': options.get('fast'), 'verbosity': verbosity,
+                  'snapshot': snapshot, 'batch_size': int(options.get('batch_size') or 1)}
+        if len(aliases) == 1:
+            results = [self.reset_database(aliases[0], emit=emit, **kwargs)]
+        else:
+            pool = ThreadPool(len(aliases))
+            try:
+                results = pool.map(
+                    functools.partial(self.reset_in_thread, **kwargs),
+                    [(alias, emit and '%s.%s' % (emit, alias)) for alias in aliases])
+            finally:
+                pool.close()
+                pool.join()
+
+        if verbosity >= 1:
+            for alias, timings in zip(aliases, results):
+                print "Reset %s in %s: %s" % (app_names, alias, ', '.join(
+                    '%s %.3fs' % (name, timings[name])
+                    for name in ('snapshot', 'introspect', 'generate', 'execute', 'emit')
+                    if name in timings))
@@ -0,0 +1,115 @@
+"""
+Whole-database snapshots for ``reset --snapshot``: a PostgreSQL template
+database or a copy of the SQLite file, named after a hash of the schema
+the apps would be reset to, so a snapshot of an older schema is never
+restored.
+"""
+import hashlib
+import os
+import shutil
+
+from django.core.management.base import CommandError
+from django.db.backends.utils import truncate_name
+
+from entropy.management.sql import custom_sql_dir, sql_create, sql_indexes
+
+
+def snapshot_key(apps, style, connection):
+    """
+    Returns a hash of the schema the given apps are reset to: their
+    sql_create and sql_indexes output, which is cached, and the bytes of
+    their custom SQL files, which are hashed as they are rather than
+    split into statements.
+    """
+    digest = hashlib.sha1()
+    for app in apps:
+        for statement in sql_create(app, style, connection) + sql_indexes(app, style, connection):
+            digest.update(statement.encode('utf-8'))
+            digest.update(b'\n')
+        app_dir = custom_sql_dir(app)
+        if not os.path.isdir(app_dir):
+            continue
+        for name in sorted(os.listdir(app_dir)):
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(app_dir, name), 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def snapshot_name(connection, key):
+    name = connection.settings_dict['NAME']
+    if connection.vendor == 'postgresql':
+        suffix = '_snapshot_%s' % key
+        # Database names longer than the limit (63) are silently cut short,
+        # which would lose the key, so shorten the original name instead
+        return truncate_name(name, connection.ops.max_name_length() - len(suffix)) + suffix
+    if connection.vendor == 'sqlite':
+        if not name or name == ':memory:' or name.startswith('file::memory:'):
+            raise CommandError("In-memory SQLite databases can't be snapshotted.")
+        return '%s.%s.snapshot' % (name, key)
+    raise CommandError("Snapshots need PostgreSQL or SQLite, not %s." % connection.vendor)
+
+def _sqlite_backup(connection, path, restore=False):
+    """
+    Copies the database to path, or back from it if restore is True,
+    through the online backup API where Python has it (3.7+), otherwise
+    as a file copy with the connection closed.
+    """
+    connection.ensure_connection()
+    raw = connection.connection
+    if not hasattr(raw, 'backup'):
+        connection.close()
+        name = connection.settings_dict['NAME']
+        if restore:
+            shutil.copyfile(path, name)
+        else:
+            shutil.copyfile(name, path)
+        return
+    import sqlite3
+    other = sqlite3.connect(path)
+    try:
+        if restore:
+            other.backup(raw)
+        else:
+            raw.backup(other)
+    finally:
+        other.close()
+
+def save_snapshot(connection, key):
+    "Snapshots the database as it is now."
+    name = snapshot_name(connection, key)
+    if connection.vendor == 'postgresql':
+        qn = connection.ops.quote_name
+        connection.close()
+        # A database can only be copied while nobody is connected to it
+        nodb = connection.creation._nodb_connection
+        with nodb.cursor() as cursor:
+            cursor.execute('DROP DATABASE IF EXISTS %s' % qn(name))
+            cursor.execute('CREATE DATABASE %s TEMPLATE %s' % (
+                qn(name), qn(connection.settings_dict['NAME'])))
+    else:
+        _sqlite_backup(connection, name)
+    return name
+
+def restore_snapshot(connection, key):
+    """
+    Replaces the database with its snapshot for the given key. Returns
+    False, changing nothing, if there is no such snapshot.
+    """
+    name = snapshot_name(connection, key)
+    if connection.vendor == 'postgresql':
+        qn = connection.ops.quote_name
+        nodb = connection.creation._nodb_connection
+        with nodb.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', [name])
+            if cursor.fetchone() is None:
+                return False
+            connection.close()
+            cursor.execute('DROP DATABASE %s' % qn(connection.settings_dict['NAME']))
+            cursor.execute('CREATE DATABASE %s TEMPLATE %s' % (
+                qn(connection.settings_dict['NAME']), qn(name)))
+        return True
+    if not os.path.exists(name):
+        return False
+    _sqlite_backup(connection, name, restore=True)
+    return True
@@ -1,11 +1,179 @@
+import functools
+import hashlib
+import io
+import itertools
+import json
 import os
 import re
+import tempfile
 
 from django.conf import settings
 from django.core.management.base import CommandError
 from django.db import models
 from django.db.models import get_models
 
+from entropy import settings as entropy_settings
+
+# What iter_sql_statements looks for outside quotes and comments:
+# comment starts, quotes, PostgreSQL E'' strings and dollar-quote tags and
+# semicolons
+sql_token_re = re.compile(r"""--|/\*|(?<![A-Za-z_0-9])[Ee]'|'|"|\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$|;""")
+# Longest text a token split over two reads can start with
+SQL_TOKEN_TAIL = 66
+
+def iter_sql_statements(fp, chunk_size=64 * 1024, vendor=None):
+    """
+    Yields the statements in the SQL file object fp one at a time, each
+    ending in a semicolon and without comments. Quoted strings and
+    identifiers and dollar-quoted bodies are kept intact, with backslash
+    escapes inside quotes on MySQL and inside E'' strings on PostgreSQL
+    (vendor as in connection.vendor). The file is read chunk_size
+    characters at a time, so memory use only depends on the longest
+    statement.
+    """
+    buf, pos, eof = u'', 0, False
+    statement = []
+    # What ends the quote or comment being read, whether to keep it and
+    # whether backslashes escape within it
+    close, keep, escapes = None, True, False
+    while True:
+        if close is None:
+            match = sql_token_re.search(buf, pos)
+            if match is None:
+                if eof:
+                    statement.append(buf[pos:])
+                    break
+                start = max(pos, len(buf) - SQL_TOKEN_TAIL)
+                statement.append(buf[pos:start])
+            else:
+                token = match.group()
+                statement.append(buf[pos:match.start()])
+                pos = match.end()
+                if token == ';':
+                    text = u''.join(statement).strip()
+                    if text:
+                        yield text + u';'
+                    statement = []
+                elif token == '--':
+                    close, keep = '\n', False
+                elif token == '/*':
+                    close, keep = '*/', False
+                else:
+                    statement.append(token)
+                    # E'' strings end like any other
+                    close, keep = token.lstrip('Ee'), True
+                    escapes = (vendor == 'mysql' and close in ("'", '"') or
+                               vendor == 'postgresql' and token[0] in 'Ee')
+                continue
+        else:
+            end = buf.find(close, pos)
+            if escapes:
+                slash = buf.find('\\', pos, len(buf) if end == -1 else end)
+                if slash != -1:
+                    if slash + 1 < len(buf):
+                        statement.append(buf[pos:slash + 2])
+                        pos = slash + 2
+                        continue
+                    if not eof:
+                        # The escaped character is in the next read
+                        end = -1
+            if end != -1 and close in ("'", '"'):
+                if end + 1 == len(buf) and not eof:
+                    # Can't tell a closing quote from a doubled one yet
+                    end = -1
+                elif buf[end + 1:end + 2] == close:
+                    statement.append(buf[pos:end + 2])
+                    pos = end + 2
+                    continue
+            if end != -1:
+                end += len(close)
+                if keep:
+                    statement.append(buf[pos:end])
+                else:
+                    # Keep the tokens on either side of the comment apart
+                    statement.append(u'\n' if close == '\n' else u' ')
+                close, pos, escapes = None, end, False
+                continue
+            if eof:
+                if keep:
+                    statement.append(buf[pos:])
+                break
+            start = max(pos, len(buf) - len(close))
+            if keep:
+                statement.append(buf[pos:start])
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[start:] + chunk, 0
+
+    text = u''.join(statement).strip()
+    if text:
+        yield text + u';'
+
+def custom_sql_dir(app):
+    return os.path.normpath(os.path.join(os.path.dirname(app.__file__), 'sql'))
+
+def ddl_fingerprint(app, style, connection, introspect=False):
+    """
+    Returns a hash of everything the DDL generated for the given app
+    depends on: the backend and style, the models' tables, fields and
+    indexes and, if introspect is True, the tables already in the database.
+    """
+    parts = [connection.settings_dict['ENGINE'], style.SQL_KEYWORD('x'), style.SQL_TABLE('x')]
+    for model in models.get_models(app, include_auto_created=True):
+        opts = model._meta
+        parts.append([opts.db_table, opts.managed, opts.proxy, opts.db_tablespace,
+                      list(opts.unique_together), list(opts.index_together)])
+        for f in opts.local_fields:
+            parts.append([f.name, f.column, f.db_type(connection=connection), f.null,
+                          f.unique, f.db_index, f.primary_key, f.db_tablespace,
+                          f.rel and f.rel.to._meta.db_table, hasattr(f, 'post_create_sql')])
+    if introspect:
+        parts.append(sorted(connection.introspection.table_names()))
+    return hashlib.sha1(json.dumps(parts)).hexdigest()
+
+def cached_ddl(introspect=False):
+    """
+    Caches the statement list a sql_* function generates from the models
+    of an app in ENTROPY_DDL_CACHE_DIR, keyed by ddl_fingerprint. Custom
+    SQL files are read as they are, so sql_custom is not cached.
+    """
+    def decorator(generate):
+        @functools.wraps(generate)
+        def wrapper(app, style, connection):
+            cache_dir = entropy_settings.DDL_CACHE_DIR
+            if not cache_dir:
+                return generate(app, style, connection)
+            path = os.path.join(cache_dir, '%s-%s-%s.json' % (
+                app.__name__.split('.')[-2], generate.__name__,
+                ddl_fingerprint(app, style, connection, introspect)))
+            try:
+                with open(path) as fp:
+                    return json.load(fp)
+            except (IOError, ValueError):
+                pass
+            output = generate(app, style, connection)
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                # Already there, possibly made by a concurrent reset
+                if not os.path.isdir(cache_dir):
+                    raise
+            # Write a file of our own, then rename it into place, so
+            # concurrent resets (threads included) never see half a file
+            fd, temp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as fp:
+                    json.dump(output, fp)
+                os.rename(temp, path)
+            except OSError:
+                # Another reset stored the same statements first
+                if os.path.exists(temp):
+                    os.remove(temp)
+            return output
+        return wrapper
+    return decorator
+
+@cached_ddl(introspect=True)
 def sql_create(app, style, connection):
     "Returns a list of the CREATE TABLE SQL statements for the given app."
 
@@ -52,8 +220,13 @@ def sql_create(app, style, connection):
 
     return final_output
 
-def sql_delete(app, style, connection):
-    "Returns a list of the DROP TABLE SQL statements for the given app."
+def sql_delete(app, style, connection, close_connection=True):
+    """
+    Returns a list of the DROP TABLE SQL statements for the given app.
+
+    The connection is closed afterwards unless close_connection is False,
+    for callers that go on to execute the statements on it.
+    """
 
     # This should work even if a connection isn't available
     try:
@@ -70,19 +243,9 @@ def sql_delete(app, style, connection):
     output = []
 
     # Output DROP TABLE statements for standard application tables.
-    to_delete = set()
-
-    references_to_delete = {}
     app_models = models.get_models(app, include_auto_created=True)
-    for model in app_models:
-        if cursor and connection.introspection.table_name_converter(model._meta.db_table) in table_names:
-            # The table exists, so it needs to be dropped
-            opts = model._meta
-            for f in opts.local_fields:
-                if f.rel and f.rel.to not in to_delete:
-                    references_to_delete.setdefault(f.rel.to, []).append( (model, f) )
-
-            to_delete.add(model)
+    references_to_delete = get_references_to_delete(app_models,
+        lambda model: cursor and connection.introspection.table_name_converter(model._meta.db_table) in table_names)
 
     for model in app_models:
         if connection.introspection.table_name_converter(model._meta.db_table) in table_names:
@@ -92,11 +255,60 @@ def sql_delete(app, style, connection):
     # directly into a database client, to avoid locking issues.
     if cursor:
         cursor.close()
-        connection.close()
+        if close_connection:
+            connection.close()
 
     return output[::-1] # Reverse it, to deal with table dependencies.
 
-def sql_reset(app, style, connection):
+def get_references_to_delete(app_models, exists=lambda model: True):
+    """
+    Maps each model referenced by the given models whose tables exist to
+    the (model, field) pairs referencing it, as sql_destroy_model expects.
+    """
+    to_delete = set()
+    references_to_delete = {}
+    for model in app_models:
+        if exists(model):
+            # The table exists, so it needs to be dropped
+            opts = model._meta
+            for f in opts.local_fields:
+                if f.rel and f.rel.to not in to_delete:
+                    references_to_delete.setdefault(f.rel.to, []).append( (model, f) )
+
+            to_delete.add(model)
+    return references_to_delete
+
+def dependency_order(apps):
+    """
+    Returns the given apps ordered so that each comes after the other given
+    apps its models reference: the order to create them in, and reversed,
+    the order to drop them in. Apps referencing each other keep their
+    relative order.
+    """
+    owners = {}
+    for app in apps:
+        for model in models.get_models(app, include_auto_created=True):
+            owners[model] = app
+    references = {}
+    for app in apps:
+        referenced = get_references_to_delete(models.get_models(app, include_auto_created=True))
+        references[app] = [owners[model] for model in referenced
+                           if owners.get(model, app) is not app]
+
+    ordered, visiting = [], set()
+    def visit(app):
+        if app in ordered or app in visiting:
+            return
+        visiting.add(app)
+        for other in references[app]:
+            visit(other)
+        visiting.discard(app)
+        ordered.append(app)
+    for app in apps:
+        visit(app)
+    return ordered
+
+def sql_reset(app, style, connection, close_connection=True):
     "Returns a list of the DROP TABLE SQL, then the CREATE TABLE SQL, for the given module."
     # This command breaks a lot and should be deprecated
     import warnings
@@ -104,7 +316,59 @@ def sql_reset(app, style, connection):
         'This command has been deprecated. The command ``sqlflush`` can be used to delete everything. You can also use ALTER TABLE or DROP TABLE statements manually.',
         PendingDeprecationWarning
     )
-    return sql_delete(app, style, connection) + sql_all(app, style, connection)
+    return sql_delete(app, style, connection, close_connection) + sql_all(app, style, connection)
+
+def app_table_names(app, connection):
+    """
+    Returns (existing, missing): the table names of the given app's models
+    that exist in the database, and those that don't.
+    """
+    tables = set(connection.introspection.table_names())
+    existing, missing = [], []
+    for model in models.get_models(app, include_auto_created=True):
+        if not model._meta.managed or model._meta.proxy:
+            continue
+        name = model._meta.db_table
+        if connection.introspection.table_name_converter(name) in tables:
+            existing.append(name)
+        else:
+            missing.append(name)
+    return existing, missing
+
+def sql_truncate(app, style, connection, tables=None):
+    """
+    Returns the SQL statements that empty the tables of the given app and
+    restart their sequences, leaving the schema in place: a single
+    TRUNCATE ... RESTART IDENTITY CASCADE on PostgreSQL, the backend's
+    flush statements elsewhere.
+    """
+    if tables is None:
+        tables = app_table_names(app, connection)[0]
+    if not tables:
+        return []
+    if connection.vendor == 'postgresql':
+        return ['%s %s %s;' % (
+            style.SQL_KEYWORD('TRUNCATE'),
+            ', '.join(style.SQL_FIELD(connection.ops.quote_name(table)) for table in tables),
+            style.SQL_KEYWORD('RESTART IDENTITY CASCADE'),
+        )]
+    sequences = []
+    for model in models.get_models(app, include_auto_created=True):
+        if model._meta.db_table in tables:
+            for f in model._meta.local_fields:
+                if isinstance(f, models.AutoField):
+                    sequences.append({'table': model._meta.db_table, 'column': f.column})
+                    break
+    output = connection.ops.sql_flush(style, tables, sequences)
+    if connection.vendor == 'sqlite' and sequences:
+        # AUTOINCREMENT counters survive DELETE FROM
+        output.append("%s %s %s %s name IN (%s);" % (
+            style.SQL_KEYWORD('DELETE'),
+            style.SQL_KEYWORD('FROM'),
+            style.SQL_TABLE('sqlite_sequence'),
+            style.SQL_KEYWORD('WHERE'),
+            ', '.join("'%s'" % sequence['table'] for sequence in sequences)))
+    return output
 
 def sql_flush(style, connection, only_django=False):
     """
@@ -127,13 +391,13 @@ def sql_custom(app, style, connection):
     output = []
 
     app_models = get_models(app)
-    app_dir = os.path.normpath(os.path.join(os.path.dirname(app.__file__), 'sql'))
 
     for model in app_models:
         output.extend(custom_sql_for_model(model, style, connection))
 
     return output
 
+@cached_ddl()
 def sql_indexes(app, style, connection):
     "Returns a list of the CREATE INDEX SQL statements for all models in the given app."
     output = []
@@ -146,9 +410,11 @@ def sql_all(app, style, connection):
     return sql_create(app, style, connection) + sql_custom(app, style, connection) + sql_indexes(app, style, connection)
 
 def custom_sql_for_model(model, style, connection):
+    return list(iter_custom_sql_for_model(model, style, connection))
+
+def iter_custom_sql_for_model(model, style, connection):
     opts = model._meta
-    app_dir = os.path.normpath(os.path.join(os.path.dirname(models.get_app(model._meta.app_label).__file__), 'sql'))
-    output = []
+    app_dir = custom_sql_dir(models.get_app(model._meta.app_label))
 
     # Post-creation SQL should come before any initial SQL data is loaded.
     # However, this should not be done for models that are unmanaged or
@@ -156,11 +422,8 @@ def custom_sql_for_model(model, style, connection):
     if opts.managed:
         post_sql_fields = [f for f in opts.local_fields if hasattr(f, 'post_create_sql')]
         for f in post_sql_fields:
-            output.extend(f.post_create_sql(style, model._meta.db_table))
-
-    # Some backends can't execute more than one SQL statement at a time,
-    # so split into separate statements.
-    statements = re.compile(r";[ \t]*$", re.M)
+            for statement in f.post_create_sql(style, model._meta.db_table):
+                yield statement
 
     # Find custom SQL, if it's available.
     backend_name = connection.settings_dict['ENGINE'].split('.')[-1]
@@ -168,15 +431,24 @@ def custom_sql_for_model(model, style, connection):
                  os.path.join(app_dir, "%s.sql" % opts.object_name.lower())]
     for sql_file in sql_files:
         if os.path.exists(sql_file):
-            fp = open(sql_file, 'U')
-            for statement in statements.split(fp.read().decode(settings.FILE_CHARSET)):
-                # Remove any comments from the file
-                statement = re.sub(ur"--.*([\n\Z]|$)", "", statement)
-                if statement.strip():
-                    output.append(statement + u";")
-            fp.close()
+            with io.open(sql_file, encoding=settings.FILE_CHARSET) as fp:
+                for statement in iter_sql_statements(fp, vendor=connection.vendor):
+                    yield statement
 
-    return output
+def iter_sql_custom(app, style, connection):
+    "Like sql_custom, but streams the statements from the custom SQL files."
+    for model in get_models(app):
+        for statement in iter_custom_sql_for_model(model, style, connection):
+            yield statement
+
+def iter_sql_all(app, style, connection):
+    """
+    Like sql_all, but the custom SQL files are only read as the result is
+    iterated, so large seed files never sit in memory.
+    """
+    return itertools.chain(sql_create(app, style, connection),
+                           iter_sql_custom(app, style, connection),
+                           sql_indexes(app, style, connection))
 
 
 def emit_post_sync_signal(created_models, verbosity, interactive, db):
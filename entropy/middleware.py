@@ -0,0 +1,30 @@
+from .context import reset_current_user, set_current_user
+
+
+_unset = object()
+
+
+class CurrentUserMiddleware(object):
+    '''
+    Makes ``request.user`` the current user for the duration of the
+    request, so CreatedMixin, ModifiedMixin and OwnerMixin fill their user
+    fields in the same INSERT/UPDATE.  Place it after
+    AuthenticationMiddleware.
+    '''
+
+    def process_request(self, request):
+        request._entropy_user_token = set_current_user(
+            getattr(request, 'user', None))
+
+    def _reset(self, request):
+        token = getattr(request, '_entropy_user_token', _unset)
+        if token is not _unset:
+            del request._entropy_user_token
+            reset_current_user(token)
+
+    def process_response(self, request, response):
+        self._reset(request)
+        return response
+
+    def process_exception(self, request, exception):
+        self._reset(request)
@@ -1,74 +1,46 @@
 # -*- coding: utf-8 -*-
-import datetime
-from south.db import db
-from south.v2 import SchemaMigration
-from django.db import models
-
-
-class Migration(SchemaMigration):
-
-    def forwards(self, orm):
-        # Adding model 'Attribute'
-        db.create_table(u'entropy_attribute', (
-            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
-            ('content_type', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['contenttypes.ContentType'])),
-            ('object_id', self.gf('django.db.models.fields.PositiveIntegerField')()),
-            ('name', self.gf('django.db.models.fields.SlugField')(max_length=256)),
-            ('value', self.gf('django.db.models.fields.CharField')(max_length=2048)),
-        ))
-        db.send_create_signal(u'entropy', ['Attribute'])
-
-        # Adding model 'Image'
-        db.create_table(u'entropy_image', (
-            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
-            ('content_type', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['contenttypes.ContentType'])),
-            ('object_id', self.gf('django.db.models.fields.PositiveIntegerField')()),
-            ('image', self.gf('filebrowser.fields.FileBrowseField')(max_length=1024, null=True)),
-            ('caption', self.gf('django.db.models.fields.TextField')(blank=True)),
-            ('is_icon', self.gf('django.db.models.fields.BooleanField')(default=False)),
-            ('order', self.gf('django.db.models.fields.PositiveSmallIntegerField')(default=0)),
-            ('_path', self.gf('django.db.models.fields.CharField')(max_length=1024, blank=True)),
-            ('enabled', self.gf('django.db.models.fields.BooleanField')(default=False, db_index=True)),
-        ))
-        db.send_create_signal(u'entropy', ['Image'])
-
-
-    def backwards(self, orm):
-        # Deleting model 'Attribute'
-        db.delete_table(u'entropy_attribute')
-
-        # Deleting model 'Image'
-        db.delete_table(u'entropy_image')
-
-
-    models = {
-        u'contenttypes.contenttype': {
-            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
-            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
-            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
-            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
-            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
-        },
-        u'entropy.attribute': {
-            'Meta': {'ordering': "('name',)", 'object_name': 'Attribute'},
-            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
-            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
-            'name': ('django.db.models.fields.SlugField', [], {'max_length': '256'}),
-            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
-            'value': ('django.db.models.fields.CharField', [], {'max_length': '2048'})
-        },
-        u'entropy.image': {
-            'Meta': {'ordering': "('order',)", 'object_name': 'Image'},
-            '_path': ('django.db.models.fields.CharField', [], {'max_length': '1024', 'blank': 'True'}),
-            'caption': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
-            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
-            'enabled': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
-            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
-            'image': ('filebrowser.fields.FileBrowseField', [], {'max_length': '1024', 'null': 'True'}),
-            'is_icon': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
-            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
-            'order': ('django.db.models.fields.PositiveSmallIntegerField', [], {'default': '0'})
-        }
-    }
-
-    complete_apps = ['entropy']
\ No newline at end of file
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attribute',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('object_id', models.PositiveIntegerField()),
+                ('name', models.SlugField(max_length=256)),
+                ('value', models.CharField(max_length=2048)),
+                ('content_type', models.ForeignKey(to='contenttypes.ContentType')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+            bases=(models.Model,),
+        ),
+        migrations.CreateModel(
+            name='Image',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('object_id', models.PositiveIntegerField()),
+                ('image', models.ImageField(help_text=b'Click thumbnail to view ful size image', max_length=1024, null=True, verbose_name=b'Image file', upload_to=b'images')),
+                ('caption', models.TextField(blank=True)),
+                ('is_icon', models.BooleanField(default=False, help_text=b'Denote one of the attached images as the primary icon for the parent object')),
+                ('order', models.PositiveSmallIntegerField(default=0, verbose_name=b'Order')),
+                ('_path', models.CharField(max_length=1024, editable=False, blank=True)),
+                ('enabled', models.BooleanField(default=False, db_index=True)),
+                ('content_type', models.ForeignKey(to='contenttypes.ContentType')),
+            ],
+            options={
+                'ordering': ('order',),
+            },
+            bases=(models.Model,),
+        ),
+    ]
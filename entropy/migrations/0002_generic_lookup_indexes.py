@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# Backends that support CREATE INDEX ... WHERE
+PARTIAL_INDEX_BACKENDS = ('postgresql', 'sqlite')
+
+
+def create_icon_index(apps, schema_editor):
+    if schema_editor.connection.vendor in PARTIAL_INDEX_BACKENDS:
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS "entropy_image_is_icon" ON "entropy_image" '
+            '("content_type_id", "object_id") WHERE "is_icon"')
+
+
+def drop_icon_index(apps, schema_editor):
+    if schema_editor.connection.vendor in PARTIAL_INDEX_BACKENDS:
+        # SQLite loses it whenever a later migration rebuilds the table
+        schema_editor.execute('DROP INDEX IF EXISTS "entropy_image_is_icon"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entropy', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='attribute',
+            index_together=set([('content_type', 'object_id', 'name')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='image',
+            index_together=set([('content_type', 'object_id', 'enabled', 'order')]),
+        ),
+        # Partial index for icon lookups
+        migrations.RunPython(create_icon_index, drop_icon_index),
+    ]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def restore_icon_index(apps, schema_editor):
+    # SQLite adds columns by rebuilding the table, which drops the partial
+    # index from 0002
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS "entropy_image_is_icon" ON "entropy_image" '
+            '("content_type_id", "object_id") WHERE "is_icon"')
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entropy', '0002_generic_lookup_indexes'),
+    ]
+
+    operations = [
+        # Run in reverse after the columns are removed
+        migrations.RunPython(noop, restore_icon_index),
+        migrations.AddField(
+            model_name='image',
+            name='_renditions',
+            field=models.TextField(default=b'', editable=False, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='rendered_at',
+            field=models.DateTimeField(db_index=True, null=True, editable=False, blank=True),
+            preserve_default=True,
+        ),
+        migrations.RunPython(restore_icon_index, noop),
+    ]
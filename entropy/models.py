@@ -1,12 +1,35 @@
+import json
+
 from django.db import models
+from django.db.models.signals import class_prepared, post_delete, post_save
 from django.contrib.contenttypes import generic
+from django.contrib.contenttypes.models import ContentType
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
 
 
 from .fields import EnabledField, ImageBrowseField
-from .base import GenericMixin
+from .base import (
+    GenericMixin, OrderingManager, StartEndBaseMixin,
+    invalidate_attribute_cache, invalidate_current_cache,
+    invalidate_link_url_cache)
+from .renditions import image_storage, render
+from . import settings as entropy_settings
 from .settings import USE_FILEBROWSER
 
 
+def resolve_image_path(image):
+    '''
+    Default ``ENTROPY_IMAGE_PATH_RESOLVER``: the local filesystem path,
+    or the URL for storages that have no local paths.
+    '''
+    try:
+        return image.image.path
+    except NotImplementedError:
+        return image.image.url
+
+
 image_kwargs = {
     'blank': False,
     'max_length':1024,
@@ -52,18 +75,85 @@ class Image(GenericMixin):
 
     enabled = EnabledField(default=False)
 
+    # Storage names of the IMAGE_RENDITIONS, as JSON
+    _renditions = models.TextField(
+        blank=True,
+        default='',
+        editable=False)
+
+    rendered_at = models.DateTimeField(
+        blank=True,
+        db_index=True,
+        editable=False,
+        null=True)
+
+    # Image.objects.reorder(pks, scope={'content_type': ct, 'object_id': pk})
+    # for drag-and-drop sorting
+    objects = OrderingManager()
+
     class Meta:
         ordering = (
             'order',
         )
+        # Serves image_set lookups; a partial index on is_icon is added
+        # by migration 0002 where the backend supports it
+        index_together = (
+            ('content_type', 'object_id', 'enabled', 'order'),
+        )
+
+    def __init__(self, *args, **kwargs):
+        super(Image, self).__init__(*args, **kwargs)
+        # Raw value as loaded, so save() can tell if the file changed
+        self._loaded_image = self.__dict__.get('image')
 
     def __unicode__(self):
         return self._path
 
+    @property
+    def renditions(self):
+        '''``{spec_name: storage name}`` of the precomputed renditions'''
+        return json.loads(self._renditions) if self._renditions else {}
+
+    @property
+    def rendition_urls(self):
+        '''
+        ``{spec_name: url}``, for templates:
+
+            <img src="{{ image.rendition_urls.thumb }}">
+        '''
+        storage = image_storage()
+        return dict(
+            (spec_name, storage.url(name))
+            for spec_name, name in self.renditions.items())
+
+    def render(self):
+        '''Regenerate the renditions; the caller saves'''
+        name = self._meta.get_field('image').get_prep_value(self.image)
+        self._renditions = json.dumps(render(image_storage(), name))
+        self.rendered_at = timezone.now()
+
+    def image_changed(self):
+        field = self._meta.get_field('image')
+        return (field.get_prep_value(self.image) !=
+                field.get_prep_value(self._loaded_image))
+
     # Purge related item's cache on change
     def save(self, *args, **kwargs):
-        self._path = self.image.path
-        return super(Image, self).save(*args, **kwargs)
+        # Only go to storage when the file itself changed, so saving the
+        # caption, order or enabled flag never does
+        if self._state.adding or not self._path or self.image_changed():
+            # Commit any upload first so the stored name is final
+            self._meta.get_field('image').pre_save(self, self._state.adding)
+            self._path = import_string(entropy_settings.IMAGE_PATH_RESOLVER)(self) if self.image else ''
+            if (self.image and entropy_settings.IMAGE_RENDITIONS
+                    and entropy_settings.IMAGE_RENDER_ON_SAVE):
+                self.render()
+            else:
+                # Stale now; render_images picks up rows never rendered
+                self._renditions = ''
+                self.rendered_at = None
+        super(Image, self).save(*args, **kwargs)
+        self._loaded_image = self.__dict__.get('image')
 
 
 class Attribute(GenericMixin):
@@ -73,5 +163,53 @@ class Attribute(GenericMixin):
 
     class Meta:
         ordering = ('name',)
+        index_together = (
+            ('content_type', 'object_id', 'name'),
+        )
+
     def __unicode__(self): # pragma: no cover
-        return u'%s=%s' % (self.name, self.value,)
\ No newline at end of file
+        return u'%s=%s' % (self.name, self.value,)
+
+
+@receiver(post_save, sender=Attribute)
+@receiver(post_delete, sender=Attribute)
+def invalidate_attributes(sender, instance, **kwargs):
+    invalidate_attribute_cache(instance.content_type_id, instance.object_id)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_current(sender, instance, **kwargs):
+    if entropy_settings.CURRENT_CACHE is None:
+        return
+    if isinstance(instance, StartEndBaseMixin):
+        invalidate_current_cache(sender)
+
+
+def invalidate_link_urls(sender, instance, **kwargs):
+    if entropy_settings.LINK_URL_CACHE is None:
+        return
+    content_type = ContentType.objects.get_for_model(sender)
+    invalidate_link_url_cache(content_type.pk, instance.pk)
+
+
+def connect_link_url_invalidation(model):
+    '''
+    Invalidate the cached URLs of links to ``model`` when its rows change,
+    if links can point at it and get a URL from it
+    '''
+    if model._meta.auto_created or not hasattr(model, 'get_absolute_url'):
+        return
+    linkable = entropy_settings.LINKABLE_MODELS
+    if linkable and model._meta.model_name not in linkable:
+        return
+    post_save.connect(invalidate_link_urls, sender=model,
+                      dispatch_uid='entropy.invalidate_link_urls')
+    post_delete.connect(invalidate_link_urls, sender=model,
+                        dispatch_uid='entropy.invalidate_link_urls')
+
+
+@receiver(class_prepared)
+def connect_prepared_link_urls(sender, **kwargs):
+    # Models prepared before this module are connected by EntropyConfig
+    connect_link_url_invalidation(sender)
@@ -0,0 +1,71 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from . import settings as entropy_settings
+
+
+DEFAULT_QUALITY = 85
+
+
+def rendition_name(spec_name, name):
+    '''Storage name of the ``spec_name`` rendition of the file ``name``'''
+    return os.path.join(entropy_settings.IMAGE_RENDITIONS_DIR, spec_name, name)
+
+
+def image_storage():
+    '''Storage holding the files of entropy.Image'''
+    from .models import Image
+    return getattr(Image._meta.get_field('image'), 'storage', default_storage)
+
+
+def render(storage, name, specs=None):
+    '''
+    Generate every rendition in ``specs`` (``IMAGE_RENDITIONS`` by default)
+    for the file ``name`` and return ``{spec_name: storage name}``.
+
+    The source is decoded once and each rendition written back to
+    ``storage``, replacing any previous version.
+    '''
+    from PIL import Image as PILImage, ImageOps
+
+    if specs is None:
+        specs = entropy_settings.IMAGE_RENDITIONS
+
+    source_file = storage.open(name, 'rb')
+    try:
+        source = PILImage.open(source_file)
+        source.load()
+    finally:
+        source_file.close()
+    format = source.format or 'JPEG'
+
+    renditions = {}
+    for spec_name, spec in specs.items():
+        size = tuple(spec['size'])
+        if spec.get('crop'):
+            rendered = ImageOps.fit(source, size, PILImage.ANTIALIAS)
+        else:
+            rendered = source.copy()
+            rendered.thumbnail(size, PILImage.ANTIALIAS)
+        if format == 'JPEG' and rendered.mode not in ('RGB', 'L'):
+            rendered = rendered.convert('RGB')
+
+        output = BytesIO()
+        rendered.save(output, format, quality=spec.get('quality', DEFAULT_QUALITY))
+        target = rendition_name(spec_name, name)
+        if storage.exists(target):
+            storage.delete(target)
+        renditions[spec_name] = storage.save(target, ContentFile(output.getvalue()))
+    return renditions
+
+
+def render_task(args):
+    '''Process pool entry point: ``(pk, name)`` -> ``(pk, renditions or error)``'''
+    pk, name = args
+    try:
+        return pk, render(image_storage(), name), None
+    except Exception as e:
+        return pk, None, '%s: %s' % (e.__class__.__name__, e)
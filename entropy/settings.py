@@ -2,4 +2,48 @@ from django.conf import settings
 
 
 LINKABLE_MODELS = getattr(settings, "MENUS_LINKABLE_MODELS", [])
-USE_FILEBROWSER = getattr(settings, "ENTROPY_USE_FILEBROWSER", False)
\ No newline at end of file
+USE_FILEBROWSER = getattr(settings, "ENTROPY_USE_FILEBROWSER", False)
+
+# How many times a save on a SlugUniqueMixin model may retry after losing
+# a race for its slug to a concurrent insert
+SLUG_RETRIES = getattr(settings, "ENTROPY_SLUG_RETRIES", 3)
+
+# Cache alias used to share AttributeMixin attribute dicts across requests,
+# None to only cache them per instance
+ATTRIBUTE_CACHE = getattr(settings, "ENTROPY_ATTRIBUTE_CACHE", None)
+ATTRIBUTE_CACHE_TIMEOUT = getattr(settings, "ENTROPY_ATTRIBUTE_CACHE_TIMEOUT", 60 * 60)
+
+# Dotted path to a callable taking an entropy.Image and returning the value
+# cached in Image._path; the default stores the local path, or the URL for
+# storages without one
+IMAGE_PATH_RESOLVER = getattr(settings, "ENTROPY_IMAGE_PATH_RESOLVER",
+    "entropy.models.resolve_image_path")
+
+# Precomputed renditions of entropy.Image, e.g.
+# {'thumb': {'size': (200, 200), 'crop': True, 'quality': 85}}
+IMAGE_RENDITIONS = getattr(settings, "ENTROPY_IMAGE_RENDITIONS", {})
+IMAGE_RENDITIONS_DIR = getattr(settings, "ENTROPY_IMAGE_RENDITIONS_DIR", "renditions")
+# Render as part of Image.save() when the file changes; otherwise leave it
+# to the render_images management command
+IMAGE_RENDER_ON_SAVE = getattr(settings, "ENTROPY_IMAGE_RENDER_ON_SAVE", True)
+
+# Round "now" down to this many seconds in current()/published() so the
+# same SQL is issued for the whole interval; None for the exact time
+CURRENT_GRANULARITY = getattr(settings, "ENTROPY_CURRENT_GRANULARITY", None)
+# Cache alias for StartEndManager.current_ids()/published_ids(), None to
+# always query them
+CURRENT_CACHE = getattr(settings, "ENTROPY_CURRENT_CACHE", None)
+
+# Spacing left between positions by OrderingManager.move(), so moving an
+# item usually rewrites just its own row
+ORDERING_GAP = getattr(settings, "ENTROPY_ORDERING_GAP", 32)
+
+# Cache alias for the URLs LinkURLMixin resolves through its linked object,
+# or None to resolve them on every request; entries are invalidated when
+# the linked object is saved or deleted
+LINK_URL_CACHE = getattr(settings, "ENTROPY_LINK_URL_CACHE", None)
+LINK_URL_CACHE_TIMEOUT = getattr(settings, "ENTROPY_LINK_URL_CACHE_TIMEOUT", None)
+
+# Directory for the DDL entropy.management.sql generates, keyed on the
+# model definitions and backend; None to always generate
+DDL_CACHE_DIR = getattr(settings, "ENTROPY_DDL_CACHE_DIR", None)
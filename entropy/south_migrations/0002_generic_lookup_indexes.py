@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+# Backends that support CREATE INDEX ... WHERE
+PARTIAL_INDEX_BACKENDS = ('postgres', 'sqlite3')
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding index on 'Attribute', fields ['content_type', 'object_id', 'name']
+        db.create_index(u'entropy_attribute', ['content_type_id', 'object_id', 'name'])
+
+        # Adding index on 'Image', fields ['content_type', 'object_id', 'enabled', 'order']
+        db.create_index(u'entropy_image', ['content_type_id', 'object_id', 'enabled', 'order'])
+
+        # Adding partial index on 'Image' for icon lookups
+        if db.backend_name in PARTIAL_INDEX_BACKENDS:
+            db.execute('CREATE INDEX "entropy_image_is_icon" ON "entropy_image" '
+                       '("content_type_id", "object_id") WHERE "is_icon"')
+
+
+    def backwards(self, orm):
+        # Removing partial index on 'Image' for icon lookups
+        if db.backend_name in PARTIAL_INDEX_BACKENDS:
+            db.execute('DROP INDEX "entropy_image_is_icon"')
+
+        # Removing index on 'Image', fields ['content_type', 'object_id', 'enabled', 'order']
+        db.delete_index(u'entropy_image', ['content_type_id', 'object_id', 'enabled', 'order'])
+
+        # Removing index on 'Attribute', fields ['content_type', 'object_id', 'name']
+        db.delete_index(u'entropy_attribute', ['content_type_id', 'object_id', 'name'])
+
+
+    models = {
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'entropy.attribute': {
+            'Meta': {'ordering': "('name',)", 'object_name': 'Attribute', 'index_together': "[['content_type', 'object_id', 'name']]"},
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.SlugField', [], {'max_length': '256'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'value': ('django.db.models.fields.CharField', [], {'max_length': '2048'})
+        },
+        u'entropy.image': {
+            'Meta': {'ordering': "('order',)", 'object_name': 'Image', 'index_together': "[['content_type', 'object_id', 'enabled', 'order']]"},
+            '_path': ('django.db.models.fields.CharField', [], {'max_length': '1024', 'blank': 'True'}),
+            'caption': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            'enabled': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'image': ('filebrowser.fields.FileBrowseField', [], {'max_length': '1024', 'null': 'True'}),
+            'is_icon': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'order': ('django.db.models.fields.PositiveSmallIntegerField', [], {'default': '0'})
+        }
+    }
+
+    complete_apps = ['entropy']
\ No newline at end of file
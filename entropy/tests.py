@@ -5,7 +5,122 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
-from django.test import TestCase
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections, models
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import six, timezone
+
+from . import renditions as entropy_renditions
+from . import settings as entropy_settings
+from .base import (
+    AttributeMixin, AttributeManager, AuditManager, CreatedMixin,
+    DirtyFieldsMixin, ImageMixin, ImageManager,
+    LinkManager, LinkURLMixin, LivePublishingMixin, LivePublishingManager, ModifiedMixin, NameMixin, OrderingManager, OrderingMixin,
+    OwnerMixin,
+    PublishingMixin, PublishingManager, StartEndBetaMixin, StartEndManager,
+    TextMixin, TitleMixin, SlugMixin, SlugUniqueMixin, SlugManager, bucketed_now,
+    next_free_slug, prefetch_images)
+from .context import current_user, get_current_user
+from .middleware import CurrentUserMiddleware
+from .models import Attribute, Image
+from .text import truncate, truncate_chars
+
+
+# Concrete models for exercising the abstract mixins
+
+class SlugArticle(TitleMixin, SlugMixin):
+    objects = SlugManager()
+
+
+class UniqueSlugArticle(TitleMixin, SlugUniqueMixin):
+    objects = SlugManager()
+
+
+class AttributedProduct(NameMixin, AttributeMixin):
+    objects = AttributeManager()
+
+
+class ImageProduct(NameMixin, ImageMixin):
+    objects = ImageManager()
+
+
+class ImageArticle(TitleMixin, ImageMixin):
+    pass
+
+
+def create_images(obj, *specs):
+    '''Attach Images given as (order, enabled, is_icon) without touching storage'''
+    content_type = ContentType.objects.get_for_model(obj)
+    Image.objects.bulk_create([
+        Image(content_type=content_type, object_id=obj.pk,
+              image='images/%d.jpg' % order, _path='images/%d.jpg' % order,
+              order=order, enabled=enabled, is_icon=is_icon)
+        for order, enabled, is_icon in specs])
+
+
+class Event(TitleMixin, StartEndBetaMixin):
+    objects = StartEndManager()
+
+
+class Publication(TitleMixin, PublishingMixin):
+    objects = PublishingManager()
+
+
+class LivePublication(TitleMixin, LivePublishingMixin):
+    objects = LivePublishingManager()
+
+
+class Note(TitleMixin, TextMixin):
+    pass
+
+
+class Snippet(TextMixin):
+    pass
+
+
+class Track(NameMixin, OrderingMixin):
+    album = models.PositiveIntegerField(default=0)
+
+    objects = OrderingManager()
+
+
+class Page(TitleMixin):
+    def get_absolute_url(self):
+        return '/pages/%d/' % self.pk
+
+
+class MenuLink(TitleMixin, LinkURLMixin):
+    objects = LinkManager()
+
+
+class DirtyArticle(DirtyFieldsMixin, TitleMixin, SlugMixin, TextMixin,
+                   ModifiedMixin):
+    pass
+
+
+class AuditedEntry(TitleMixin, CreatedMixin, ModifiedMixin, OwnerMixin):
+    objects = AuditManager()
+
+
+resolved = []
+
+
+def recording_resolver(image):
+    resolved.append(image.image.name)
+    return 'https://cdn.example.com/' + image.image.name
 
 
 class SimpleTest(TestCase):
@@ -14,3 +129,1195 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class SlugTest(TestCase):
+    def test_next_free_slug(self):
+        self.assertEqual(next_free_slug('news', set()), 'news')
+        self.assertEqual(next_free_slug('news', {'news'}), 'news-1')
+        self.assertEqual(
+            next_free_slug('news', {'news', 'news-1', 'news-3', 'news-feed'}),
+            'news-2')
+
+    def test_slugify_uniquely(self):
+        slugs = [UniqueSlugArticle.objects.create(title='Weekly update').slug
+                 for i in range(3)]
+        self.assertEqual(slugs, ['weekly-update', 'weekly-update-1', 'weekly-update-2'])
+        self.assertEqual(SlugArticle.objects.create(title='Weekly update').slug,
+                         'weekly-update')
+
+    def test_query_count_independent_of_collisions(self):
+        # One SELECT for the taken slugs, one INSERT, plus the savepoint
+        # pair around the insert for the unique variant
+        for i in range(20):
+            SlugArticle.objects.create(title='Weekly update')
+            UniqueSlugArticle.objects.create(title='Weekly update')
+        with self.assertNumQueries(2):
+            SlugArticle.objects.create(title='Weekly update')
+        with self.assertNumQueries(2):
+            SlugArticle.objects.create(title='Fresh title')
+        with self.assertNumQueries(4):
+            UniqueSlugArticle.objects.create(title='Weekly update')
+        with self.assertNumQueries(4):
+            UniqueSlugArticle.objects.create(title='Fresh title')
+
+    def test_only_prefix_slugs_are_read(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        SlugArticle.objects.create(title='News feed')
+        SlugArticle.objects.create(title='Newsletter')
+        article = SlugArticle(title='News')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(article.slugify_uniquely('News'), 'news')
+        self.assertFalse("'news%'" in queries[0]['sql'])
+
+        # Blank and non-ASCII titles slugify to ''
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(article.slugify_uniquely(u'\u65b0\u95fb'), '')
+        self.assertFalse("u'%'" in queries[0]['sql'])
+        SlugArticle.objects.create(title='')
+        self.assertEqual(SlugArticle.objects.create(title='').slug, '-1')
+
+    def test_lost_race_is_retried(self):
+        article = UniqueSlugArticle(title='Race')
+        original = article.slugify_uniquely
+        calls = []
+
+        def stale_slugify(sluggable):
+            # The first allocation misses a row inserted concurrently
+            calls.append(sluggable)
+            if len(calls) == 1:
+                UniqueSlugArticle.objects.create(title='Race')
+                return 'race'
+            return original(sluggable)
+
+        article.slugify_uniquely = stale_slugify
+        article.save()
+        self.assertEqual(article.slug, 'race-1')
+        self.assertEqual(len(calls), 2)
+
+
+class BulkSlugTest(TestCase):
+    def test_bulk_create_with_slugs(self):
+        UniqueSlugArticle.objects.create(title='Taken')
+        UniqueSlugArticle.objects.create(title='Clash', slug='clash-1')
+        objs = [UniqueSlugArticle(title=title) for title in
+                ('Taken', 'Fresh', 'Clash', 'Clash', 'Clash')]
+        objs.append(UniqueSlugArticle(title='Manual', slug='clash-3'))
+        # Exact-match lookup, startswith lookup for the collisions, then
+        # the insert inside its savepoint
+        with self.assertNumQueries(5):
+            UniqueSlugArticle.objects.bulk_create_with_slugs(objs)
+        self.assertEqual(
+            sorted(UniqueSlugArticle.objects.values_list('slug', flat=True)),
+            ['clash', 'clash-1', 'clash-2', 'clash-3', 'clash-4',
+             'fresh', 'taken', 'taken-1'])
+
+    def test_allocated_slugs_do_not_collide(self):
+        objs = [UniqueSlugArticle(title=title) for title in
+                ('Foo', 'Foo', 'Foo 1', 'Bar 1', 'Bar', 'Bar')]
+        UniqueSlugArticle.objects.bulk_create_with_slugs(objs)
+        self.assertEqual(
+            [obj.slug for obj in objs],
+            ['foo', 'foo-2', 'foo-1', 'bar-1', 'bar', 'bar-2'])
+
+    def test_no_collisions_single_lookup(self):
+        objs = [SlugArticle(title='Item %d' % i) for i in range(10)]
+        # One lookup, then two batched inserts inside a savepoint
+        with self.assertNumQueries(5):
+            SlugArticle.objects.bulk_create_with_slugs(objs, batch_size=5)
+        self.assertEqual(SlugArticle.objects.filter(slug='item-9').count(), 1)
+
+
+class AttributeCacheTest(TestCase):
+    def setUp(self):
+        self.product = AttributedProduct.objects.create(name='Widget')
+        self.product['colour'] = 'red'
+        self.product['size'] = 'L'
+
+    def tearDown(self):
+        entropy_settings.ATTRIBUTE_CACHE = None
+
+    def test_loaded_once_per_instance(self):
+        product = AttributedProduct.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(product['colour'], 'red')
+            self.assertEqual(product['size'], 'L')
+            self.assertRaises(KeyError, lambda: product['weight'])
+
+    def test_setitem_updates_loaded_attributes(self):
+        product = AttributedProduct.objects.get(pk=self.product.pk)
+        self.assertEqual(product['colour'], 'red')
+        product['colour'] = 'blue'
+        product['weight'] = '2kg'
+        with self.assertNumQueries(0):
+            self.assertEqual(product['colour'], 'blue')
+            self.assertEqual(product['weight'], '2kg')
+
+    def test_shared_cache(self):
+        entropy_settings.ATTRIBUTE_CACHE = 'default'
+        self.assertEqual(
+            AttributedProduct.objects.get(pk=self.product.pk)['colour'], 'red')
+        product = AttributedProduct.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(product['colour'], 'red')
+
+        Attribute.objects.filter(name='colour').get().delete()
+        product = AttributedProduct.objects.get(pk=self.product.pk)
+        self.assertRaises(KeyError, lambda: product['colour'])
+
+        self.product['colour'] = 'green'
+        product = AttributedProduct.objects.get(pk=self.product.pk)
+        self.assertEqual(product['colour'], 'green')
+
+
+class PrefetchAttributesTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            product = AttributedProduct.objects.create(name='Widget %d' % i)
+            product['colour'] = 'red'
+            product['size'] = str(i)
+
+    def test_with_attributes(self):
+        with self.assertNumQueries(2):
+            products = list(AttributedProduct.objects.with_attributes())
+            self.assertEqual([p['size'] for p in products], list('01234'))
+            self.assertTrue(all(p['colour'] == 'red' for p in products))
+
+    def test_chained_with_attributes_names(self):
+        products = AttributedProduct.objects.with_attributes(['size']).filter(
+            name__startswith='Widget')
+        with self.assertNumQueries(2):
+            products = list(products)
+            self.assertEqual(products[0]['size'], '0')
+        with self.assertNumQueries(1):
+            self.assertEqual(products[0]['colour'], 'red')
+
+    def test_with_attributes_replaces_earlier_call(self):
+        with self.assertNumQueries(2):
+            products = list(
+                AttributedProduct.objects.with_attributes(['size']).with_attributes())
+            self.assertEqual(products[0]['colour'], 'red')
+
+    def test_values_unaffected(self):
+        self.assertEqual(
+            len(AttributedProduct.objects.with_attributes().values('name')), 5)
+
+
+class SetAttributesTest(TestCase):
+    def setUp(self):
+        self.products = [AttributedProduct.objects.create(name='Widget %d' % i)
+                         for i in range(3)]
+        self.products[0].set_attributes({'colour': 'red', 'size': 'L'})
+
+    def test_set_attributes(self):
+        product = self.products[0]
+        # Read, savepoint, one UPDATE for the changed value, one INSERT
+        with self.assertNumQueries(5):
+            product.set_attributes({'colour': 'blue', 'size': 'L', 'stock': 3})
+        with self.assertNumQueries(0):
+            self.assertEqual(product['colour'], 'blue')
+            self.assertEqual(product['stock'], '3')
+        self.assertEqual(
+            dict(product.attributes.values_list('name', 'value')),
+            {'colour': 'blue', 'size': 'L', 'stock': '3'})
+
+    def test_bulk_set_attributes(self):
+        values = dict((product, {'colour': 'green', 'size': 'M'})
+                      for product in self.products)
+        # Read, savepoint, one INSERT and one UPDATE per distinct value
+        with self.assertNumQueries(6):
+            AttributedProduct.bulk_set_attributes(values)
+        self.assertEqual(Attribute.objects.filter(value='green').count(), 3)
+        self.assertEqual(Attribute.objects.filter(value='M').count(), 3)
+        with self.assertNumQueries(3):
+            AttributedProduct.bulk_set_attributes(values)
+
+
+class ImageMixinTest(TestCase):
+    def test_single_fetch(self):
+        product = ImageProduct.objects.create(name='Widget')
+        create_images(product,
+            (3, True, True), (1, True, False), (2, False, True), (4, True, False))
+        with self.assertNumQueries(1):
+            self.assertEqual(product.image.order, 1)
+            self.assertEqual([image.order for image in product.images], [3, 4])
+            self.assertEqual(product.icon.order, 3)
+            self.assertEqual([image.order for image in product.icons], [3])
+
+    def test_no_images(self):
+        product = ImageProduct.objects.create(name='Widget')
+        ContentType.objects.get_for_model(product)
+        with self.assertNumQueries(1):
+            self.assertEqual(product.image, None)
+            self.assertEqual(product.images, [])
+            self.assertEqual(product.icon, None)
+
+
+class PrefetchImagesTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            product = ImageProduct.objects.create(name='Widget %d' % i)
+            create_images(product, (2, True, True), (1, True, False), (3, False, False))
+
+    def test_prefetch_images(self):
+        with self.assertNumQueries(2):
+            products = list(ImageProduct.objects.prefetch_images().order_by('pk'))
+            self.assertEqual([p.image.order for p in products], [1, 1, 1])
+            self.assertEqual([p.icon.order for p in products], [2, 2, 2])
+            self.assertEqual([len(p.images) for p in products], [1, 1, 1])
+
+    def test_prefetch_disabled(self):
+        products = list(ImageProduct.objects.prefetch_images(enabled_only=False))
+        with self.assertNumQueries(0):
+            self.assertEqual([image.order for image in products[0].images], [2, 3])
+
+    def test_mixed_listing(self):
+        products = list(ImageProduct.objects.all())
+        articles = [ImageArticle.objects.create(title='Bare'),
+                    ImageArticle.objects.create(title='Pictured')]
+        create_images(articles[1], (5, True, False))
+        # One query per content type
+        with self.assertNumQueries(2):
+            prefetch_images(products + articles)
+        with self.assertNumQueries(0):
+            self.assertEqual(articles[0].image, None)
+            self.assertEqual(articles[1].image.order, 5)
+            self.assertEqual(products[0].image.order, 1)
+
+
+class ImageStorageTestCase(TestCase):
+    '''Stores the files of entropy.Image in a temporary directory'''
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        field = Image._meta.get_field('image')
+        self.storage = field.storage
+        field.storage = FileSystemStorage(location=self.media_root)
+
+    def tearDown(self):
+        Image._meta.get_field('image').storage = self.storage
+        shutil.rmtree(self.media_root)
+
+
+class ImageSaveTest(ImageStorageTestCase):
+    def setUp(self):
+        super(ImageSaveTest, self).setUp()
+        self.resolver = entropy_settings.IMAGE_PATH_RESOLVER
+        entropy_settings.IMAGE_PATH_RESOLVER = 'entropy.tests.recording_resolver'
+        del resolved[:]
+        self.product = ImageProduct.objects.create(name='Widget')
+
+    def tearDown(self):
+        entropy_settings.IMAGE_PATH_RESOLVER = self.resolver
+        super(ImageSaveTest, self).tearDown()
+
+    def upload(self, name):
+        return SimpleUploadedFile(name, b'not really a gif')
+
+    def test_resolved_only_when_file_changes(self):
+        image = Image(content_object=self.product, image=self.upload('a.gif'))
+        image.save()
+        self.assertEqual(len(resolved), 1)
+        self.assertEqual(image._path, 'https://cdn.example.com/' + image.image.name)
+
+        image = Image.objects.get(pk=image.pk)
+        image.order = 5
+        image.caption = 'Moved'
+        image.save()
+        self.assertEqual(len(resolved), 1)
+
+        image.image = self.upload('b.gif')
+        image.save()
+        self.assertEqual(len(resolved), 2)
+        self.assertTrue(image._path.endswith('b.gif'))
+
+    def test_default_resolver(self):
+        entropy_settings.IMAGE_PATH_RESOLVER = self.resolver
+        image = Image(content_object=self.product, image=self.upload('c.gif'))
+        image.save()
+        self.assertEqual(image._path, image.image.path)
+
+
+def gif(width=40, height=20):
+    from io import BytesIO
+    from PIL import Image as PILImage
+    output = BytesIO()
+    PILImage.new('RGB', (width, height)).save(output, 'GIF')
+    return output.getvalue()
+
+
+class RenditionTest(ImageStorageTestCase):
+    specs = {
+        'thumb': {'size': (10, 10), 'crop': True},
+        'wide': {'size': (20, 20)},
+    }
+
+    def setUp(self):
+        super(RenditionTest, self).setUp()
+        self.product = ImageProduct.objects.create(name='Widget')
+        entropy_settings.IMAGE_RENDITIONS = self.specs
+
+    def tearDown(self):
+        entropy_settings.IMAGE_RENDITIONS = {}
+        entropy_settings.IMAGE_RENDER_ON_SAVE = True
+        super(RenditionTest, self).tearDown()
+
+    def sizes(self, image):
+        from PIL import Image as PILImage
+        storage = entropy_renditions.image_storage()
+        return dict(
+            (spec_name, PILImage.open(storage.open(name)).size)
+            for spec_name, name in image.renditions.items())
+
+    def test_render_on_save(self):
+        image = Image(content_object=self.product,
+                      image=SimpleUploadedFile('r.gif', gif()))
+        image.save()
+        image = Image.objects.get(pk=image.pk)
+        self.assertEqual(self.sizes(image), {'thumb': (10, 10), 'wide': (20, 10)})
+        self.assertTrue(image.rendition_urls['thumb'].endswith(
+            'renditions/thumb/' + image.image.name))
+
+    def test_render_images_command(self):
+        entropy_settings.IMAGE_RENDER_ON_SAVE = False
+        image = Image(content_object=self.product,
+                      image=SimpleUploadedFile('s.gif', gif()))
+        image.save()
+        self.assertEqual(image.rendered_at, None)
+
+        call_command('render_images', processes=1, verbosity=0)
+        image = Image.objects.get(pk=image.pk)
+        self.assertEqual(self.sizes(image), {'thumb': (10, 10), 'wide': (20, 10)})
+
+        rendered_at = image.rendered_at
+        call_command('render_images', processes=1, verbosity=0)
+        self.assertEqual(Image.objects.get(pk=image.pk).rendered_at, rendered_at)
+        call_command('render_images', processes=1, verbosity=0,
+                     since=timezone.now().isoformat())
+        self.assertTrue(Image.objects.get(pk=image.pk).rendered_at > rendered_at)
+
+
+class PublishingTestCase(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        day = datetime.timedelta(days=1)
+        for title, enabled, start, end in (
+                ('open', True, self.now - day, None),
+                ('bounded', True, self.now - day, self.now + day),
+                ('disabled', False, self.now - day, None),
+                ('future', True, self.now + day, None),
+                ('past', True, self.now - day * 2, self.now - day)):
+            Publication.objects.create(
+                title=title, enabled=enabled, start=start, end=end)
+            Event.objects.create(title=title, start=start, end=end)
+        Event.objects.create(title='always')
+
+    def titles(self, queryset):
+        return sorted(queryset.values_list('title', flat=True))
+
+
+class PublishingTest(PublishingTestCase):
+    def test_index_together(self):
+        # Neither model redeclares Meta, and TitleMixin comes first
+        self.assertEqual(Publication._meta.index_together,
+                         (('enabled', 'start', 'end'),))
+        self.assertEqual(LivePublication._meta.index_together,
+                         (('enabled', 'start', 'end'),))
+        self.assertFalse(Publication._meta.abstract)
+        self.assertEqual(Track._meta.index_together, ())
+
+    def test_current(self):
+        self.assertEqual(self.titles(Event.objects.current()),
+                         ['always', 'bounded', 'disabled', 'open'])
+
+    def test_published(self):
+        self.assertEqual(self.titles(Publication.objects.published()),
+                         ['bounded', 'open'])
+
+    def test_chaining(self):
+        self.assertEqual(
+            self.titles(Publication.objects.enabled().current()),
+            self.titles(Publication.objects.current().enabled()))
+        self.assertEqual(
+            self.titles(Publication.objects.filter(title__startswith='b').published()),
+            ['bounded'])
+        self.assertEqual(
+            self.titles(Publication.objects.published(now=self.now + datetime.timedelta(days=3))),
+            ['future', 'open'])
+
+
+class CurrentCacheTest(PublishingTestCase):
+    def setUp(self):
+        # Before the rows are saved, so they orphan earlier tests' ids
+        entropy_settings.CURRENT_CACHE = 'default'
+        super(CurrentCacheTest, self).setUp()
+
+    def tearDown(self):
+        entropy_settings.CURRENT_GRANULARITY = None
+        entropy_settings.CURRENT_CACHE = None
+
+    def test_bucketed_now(self):
+        entropy_settings.CURRENT_GRANULARITY = 300
+        now = bucketed_now()
+        self.assertEqual((now.minute % 5, now.second, now.microsecond), (0, 0, 0))
+        self.assertTrue(timezone.now() - now < datetime.timedelta(minutes=5))
+
+    def test_current_ids(self):
+        ids = sorted(Event.objects.current().values_list('pk', flat=True))
+        self.assertEqual(sorted(Event.objects.current_ids(self.now)), ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(Event.objects.current_ids(self.now)), ids)
+
+    def test_published_ids_expire_at_boundary(self):
+        published = Publication.objects.published_ids(self.now)
+        self.assertEqual(len(published), 2)
+        later = self.now + datetime.timedelta(days=1, seconds=1)
+        # 'bounded' has ended and 'future' has started by then
+        self.assertEqual(
+            self.titles(Publication.objects.filter(
+                pk__in=Publication.objects.published_ids(later))),
+            ['future', 'open'])
+
+    def test_uncached(self):
+        entropy_settings.CURRENT_CACHE = None
+        ids = sorted(Event.objects.current().values_list('pk', flat=True))
+        with self.assertNumQueries(1):
+            self.assertEqual(sorted(Event.objects.current_ids(self.now)), ids)
+        with self.assertNumQueries(1):
+            self.assertEqual(sorted(Event.objects.current_ids(self.now)), ids)
+
+    def test_save_invalidates(self):
+        self.assertEqual(len(Publication.objects.published_ids(self.now)), 2)
+        publication = Publication.objects.get(title='disabled')
+        publication.enabled = True
+        publication.save()
+        self.assertEqual(len(Publication.objects.published_ids(self.now)), 3)
+
+
+class LivePublishingTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        day = datetime.timedelta(days=1)
+        for title, enabled, start, end in (
+                ('open', True, now - day, None),
+                ('ending', True, now - day, now + day),
+                ('disabled', False, now - day, None),
+                ('starting', True, now + day, None)):
+            LivePublication.objects.create(
+                title=title, enabled=enabled, start=start, end=end)
+        self.now = now
+        self.day = day
+
+    def titles(self, queryset):
+        return sorted(queryset.values_list('title', flat=True))
+
+    def test_save_sets_live(self):
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         self.titles(LivePublication.objects.published()))
+        self.assertEqual(self.titles(LivePublication.objects.due(self.now + self.day * 2)),
+                         ['ending', 'starting'])
+
+    def test_update_live(self):
+        later = self.now + self.day * 2
+        # One UPDATE per resulting state, inside a savepoint
+        with self.assertNumQueries(5):
+            self.assertEqual(LivePublication.objects.update_live(later), 2)
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         ['open', 'starting'])
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         self.titles(LivePublication.objects.published(later)))
+        self.assertEqual(LivePublication.objects.update_live(later), 0)
+
+    def test_save_update_fields_sets_live(self):
+        publication = LivePublication.objects.get(title='open')
+        publication.enabled = False
+        publication.save(update_fields=['enabled'])
+        self.assertEqual(self.titles(LivePublication.objects.live()), ['ending'])
+        publication = LivePublication.objects.get(title='ending')
+        publication.end = None
+        publication.save(update_fields=['end'])
+        self.assertEqual(LivePublication.objects.get(pk=publication.pk).next_transition, None)
+
+    def test_update_sets_live(self):
+        LivePublication.objects.filter(enabled=True).update(enabled=False)
+        self.assertEqual(self.titles(LivePublication.objects.live()), [])
+        LivePublication.objects.filter(title__in=['disabled', 'starting']).update(
+            enabled=True, start=self.now - self.day)
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         ['disabled', 'starting'])
+        LivePublication.objects.filter(title='open').update(
+            enabled=True, end=self.now + self.day)
+        self.assertEqual(self.titles(LivePublication.objects.due(self.now + self.day * 2)),
+                         ['open'])
+
+    def test_bulk_create_sets_live(self):
+        LivePublication.objects.bulk_create([
+            LivePublication(title='bulk open', enabled=True, start=self.now - self.day),
+            LivePublication(title='bulk starting', enabled=True, start=self.now + self.day)])
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         ['bulk open', 'ending', 'open'])
+        self.assertEqual(self.titles(LivePublication.objects.due(self.now + self.day * 2)),
+                         ['bulk starting', 'ending', 'starting'])
+
+    def test_publish_scheduled_command(self):
+        # As if the start had passed, bypassing update()'s own refresh
+        LivePublication._base_manager.filter(title='starting').update(
+            start=self.now - self.day, next_transition=self.now)
+        call_command('publish_scheduled', verbosity=0)
+        self.assertEqual(self.titles(LivePublication.objects.live()),
+                         ['ending', 'open', 'starting'])
+
+
+class TruncationTest(TestCase):
+    def test_truncate(self):
+        self.assertEqual(truncate('one two  three four', 2), 'one two...')
+        self.assertEqual(truncate('one two', 2), 'one two')
+        self.assertEqual(
+            truncate('<p>one <b>two</b></p> <p>three four</p>', 2),
+            '<p>one <b>two...</b></p>')
+        self.assertEqual(truncate('a <br> b <img src="x" /> c', 2), 'a <br> b...')
+        # A stray '<' is text, and doesn't swallow the tag after it
+        self.assertEqual(truncate('1 < 2 <b>three four</b>', 3), '1 < 2...')
+        self.assertEqual(truncate_chars('1 < 2 <b>three</b>', 7), '1 < 2 <b>t...</b>')
+
+    def test_truncate_chars(self):
+        self.assertEqual(truncate_chars('hello world', 5), 'hello...')
+        self.assertEqual(truncate_chars('hello', 5), 'hello')
+        self.assertEqual(
+            truncate_chars('<p>caf&eacute; <i>society</i></p>', 7),
+            '<p>caf&eacute; <i>so...</i></p>')
+
+    def test_text_mixin_unicode(self):
+        self.assertEqual(six.text_type(Snippet(text='Snip')), 'Snip')
+        self.assertEqual(six.text_type(Note(title='Title', text='Body')), 'Title')
+        self.assertFalse('__init__' in TextMixin.__dict__)
+
+    def test_text_mixin_memoizes(self):
+        note = Note(title='Note', text='one two three')
+        self.assertEqual(note.truncated(2), 'one two...')
+        self.assertEqual(note.truncated_chars(3), 'one...')
+        self.assertTrue(note.truncated(2) is note.truncated(2))
+        note.text = 'four five six'
+        self.assertEqual(note.truncated(2), 'four five...')
+
+
+class AuditTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='editor')
+
+    def test_save_stamps_user(self):
+        with current_user(self.user):
+            entry = AuditedEntry.objects.create(title='Entry')
+        self.assertEqual(entry.created_by, self.user)
+        self.assertEqual(entry.modified_by, self.user)
+        self.assertTrue(timezone.is_aware(entry.created_at))
+
+        entry = AuditedEntry.objects.create(title='Anonymous')
+        self.assertEqual(entry.created_by, None)
+
+    def test_update_fields(self):
+        entry = AuditedEntry.objects.create(title='Entry')
+        stamp = entry.modified_at
+        with current_user(self.user):
+            with self.assertNumQueries(1):
+                entry.title = 'Changed'
+                entry.save(update_fields=['title'])
+        entry = AuditedEntry.objects.get(pk=entry.pk)
+        self.assertEqual(entry.modified_by, self.user)
+        self.assertTrue(entry.modified_at > stamp)
+
+        with current_user(self.user):
+            with self.assertNumQueries(0):
+                entry.save(update_fields=[])
+
+    def test_queryset_update(self):
+        entry = AuditedEntry.objects.create(title='Entry')
+        stamp = entry.modified_at
+        with current_user(self.user):
+            with self.assertNumQueries(1):
+                AuditedEntry.objects.filter(pk=entry.pk).update(title='Changed')
+        entry = AuditedEntry.objects.get(pk=entry.pk)
+        self.assertEqual(entry.modified_by, self.user)
+        self.assertTrue(entry.modified_at > stamp)
+
+    def test_bulk_create(self):
+        with current_user(self.user):
+            with self.assertNumQueries(1):
+                AuditedEntry.objects.bulk_create(
+                    [AuditedEntry(title='one'), AuditedEntry(title='two')])
+        for entry in AuditedEntry.objects.all():
+            self.assertEqual(entry.created_by, self.user)
+            self.assertEqual(entry.modified_by, self.user)
+            self.assertTrue(entry.created_at is not None)
+
+
+class CurrentUserMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='editor')
+        self.middleware = CurrentUserMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def test_request_user(self):
+        self.request.user = self.user
+        self.middleware.process_request(self.request)
+        with self.assertNumQueries(1):
+            entry = AuditedEntry.objects.create(title='Entry')
+        self.assertEqual(entry.created_by, self.user)
+        self.assertEqual(entry.modified_by, self.user)
+        self.assertEqual(entry.owned_by, self.user)
+        self.middleware.process_response(self.request, HttpResponse())
+        self.assertEqual(get_current_user(), None)
+
+    def test_anonymous(self):
+        self.request.user = AnonymousUser()
+        self.middleware.process_request(self.request)
+        self.assertEqual(get_current_user(), None)
+        self.middleware.process_exception(self.request, ValueError())
+        self.middleware.process_response(self.request, HttpResponse())
+
+    def test_nested(self):
+        other = User.objects.create(username='other')
+        self.request.user = self.user
+        with current_user(other):
+            self.middleware.process_request(self.request)
+            self.assertEqual(get_current_user(), self.user)
+            self.middleware.process_response(self.request, HttpResponse())
+            self.assertEqual(get_current_user(), other)
+
+
+class DirtyFieldsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='editor')
+        self.article = DirtyArticle.objects.create(
+            title='Article', text='body ' * 1000)
+
+    def capture_update(self, obj, **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            obj.save(**kwargs)
+        self.assertEqual(len(queries), 1)
+        return queries[0]['sql']
+
+    def test_only_changed_columns(self):
+        article = DirtyArticle.objects.get(pk=self.article.pk)
+        self.assertFalse(article.is_dirty())
+        article.title = 'Changed'
+        self.assertEqual(article.get_dirty_fields(), ['title'])
+        sql = self.capture_update(article)
+        self.assertTrue('"title"' in sql)
+        self.assertTrue('"modified_at"' in sql)
+        self.assertFalse('"text"' in sql)
+        self.assertFalse(article.is_dirty())
+        self.assertEqual(DirtyArticle.objects.get(pk=article.pk).title, 'Changed')
+
+    def test_mixin_fields_included(self):
+        self.assertEqual(self.article.slug, 'article')
+        article = DirtyArticle.objects.get(pk=self.article.pk)
+        with current_user(self.user):
+            sql = self.capture_update(article)
+        self.assertTrue('"modified_by_id"' in sql)
+        self.assertFalse('"title"' in sql)
+        article = DirtyArticle.objects.get(pk=article.pk)
+        self.assertEqual(article.modified_by, self.user)
+
+    def test_explicit_update_fields(self):
+        article = DirtyArticle.objects.get(pk=self.article.pk)
+        article.title = 'Changed'
+        article.text = 'short'
+        article.save(update_fields=['text'])
+        self.assertEqual(article.get_dirty_fields(), ['title'])
+
+
+class ReorderTest(TestCase):
+    def setUp(self):
+        self.tracks = [
+            Track.objects.create(name=name, album=1, order=i)
+            for i, name in enumerate('abcde')]
+        self.other = Track.objects.create(name='x', album=2)
+
+    def names(self, album=1):
+        return ''.join(Track.objects.filter(album=album).order_by(
+            'order').values_list('name', flat=True))
+
+    def test_reorder(self):
+        pks = [self.tracks[i].pk for i in (4, 2, 0, 1, 3)]
+        with self.assertNumQueries(1):
+            self.assertEqual(Track.objects.reorder(pks, scope={'album': 1}), 5)
+        self.assertEqual(self.names(), 'ecabd')
+
+    def test_reorder_scope_and_batches(self):
+        pks = [self.other.pk] + [t.pk for t in reversed(self.tracks)]
+        with self.assertNumQueries(2):
+            self.assertEqual(Track.objects.reorder(
+                pks, scope={'album': 1}, batch_size=3), 5)
+        self.assertEqual(self.names(), 'edcba')
+        self.assertEqual(Track.objects.get(pk=self.other.pk).order, 0)
+
+    def test_move(self):
+        a, b, c, d, e = self.tracks
+        # Dense positions leave no room: renumbered with gaps
+        Track.objects.move(e.pk, after=a.pk, scope={'album': 1}, gap=10)
+        self.assertEqual(self.names(), 'aebcd')
+        self.assertEqual(
+            sorted(Track.objects.filter(album=1).values_list('order', flat=True)),
+            [10, 20, 30, 40, 50])
+        # Now one UPDATE, besides reading the positions
+        with self.assertNumQueries(2):
+            Track.objects.move(d.pk, scope={'album': 1}, gap=10)
+        self.assertEqual(self.names(), 'daebc')
+        with self.assertNumQueries(2):
+            Track.objects.move(a.pk, after=c.pk, scope={'album': 1}, gap=10)
+        self.assertEqual(self.names(), 'debca')
+
+    def test_move_outside_scope(self):
+        a, b = self.tracks[:2]
+        self.assertRaises(Track.DoesNotExist, Track.objects.move,
+                          a.pk, after=self.other.pk, scope={'album': 1})
+        self.assertRaises(Track.DoesNotExist, Track.objects.move,
+                          self.other.pk, after=a.pk, scope={'album': 1})
+        self.assertRaises(ValueError, Track.objects.move,
+                          a.pk, after=a.pk, scope={'album': 1})
+        self.assertEqual(self.names(), 'abcde')
+        self.assertEqual(Track.objects.get(pk=self.other.pk).order, 0)
+
+    def test_reorder_empty_scope(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Track.objects.reorder(
+                [t.pk for t in self.tracks], scope={'album__in': []}), 0)
+        self.assertEqual(self.names(), 'abcde')
+
+    def test_reorder_joined_scope(self):
+        product = ImageProduct.objects.create(name='Product')
+        create_images(product, (0, True, False), (1, True, False), (2, True, False))
+        pks = [image.pk for image in product._images()]
+        scope = {'content_type__model': 'imageproduct', 'object_id': product.pk}
+        self.assertEqual(Image.objects.reorder(pks[::-1], scope=scope), 3)
+        product.clear_image_cache()
+        self.assertEqual([image.pk for image in product._images()], pks[::-1])
+
+    def test_reorder_gap_fits_column(self):
+        product = ImageProduct.objects.create(name='Product')
+        create_images(product, (0, True, False), (1, True, False), (2, True, False))
+        pks = [image.pk for image in product._images()]
+        Image.objects.reorder(pks[::-1], gap=20000)
+        orders = list(Image.objects.filter(pk__in=pks).order_by(
+            'order').values_list('pk', 'order'))
+        self.assertEqual([pk for pk, order in orders], pks[::-1])
+        self.assertTrue(orders[-1][1] <= Image.objects.max_order())
+        self.assertEqual(Image.objects.max_order(), 32767)
+
+    def test_image_reorder(self):
+        product = ImageProduct.objects.create(name='Product')
+        create_images(product, (0, True, False), (1, True, False), (2, True, False))
+        pks = [image.pk for image in product._images()]
+        ct = ContentType.objects.get_for_model(product)
+        Image.objects.reorder(
+            [pks[2], pks[0], pks[1]],
+            scope={'content_type': ct, 'object_id': product.pk})
+        product.clear_image_cache()
+        self.assertEqual(
+            [image.pk for image in product._images()], [pks[2], pks[0], pks[1]])
+
+
+class LinkURLTest(TestCase):
+    def setUp(self):
+        self.pages = [Page.objects.create(title='Page %d' % i) for i in range(3)]
+        self.products = [
+            AttributedProduct.objects.create(name='Product %d' % i)
+            for i in range(2)]
+        for target in self.pages + self.products:
+            MenuLink.objects.create(title=target.pk, content_object=target)
+        MenuLink.objects.create(title='External', url='http://example.com/')
+        # Prime the ContentType cache
+        for model in (Page, AttributedProduct):
+            ContentType.objects.get_for_model(model)
+
+    def tearDown(self):
+        entropy_settings.LINK_URL_CACHE = None
+
+    def test_prefetch_links(self):
+        # One query for the links, one per content type
+        with self.assertNumQueries(3):
+            urls = [
+                link.get_absolute_url()
+                for link in MenuLink.objects.prefetch_links().order_by('pk')]
+        self.assertEqual(
+            urls,
+            ['/pages/%d/' % page.pk for page in self.pages] +
+            [None, None, 'http://example.com/'])
+        link = MenuLink.objects.prefetch_links().order_by('pk')[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(link.content_object, self.pages[0])
+
+    def test_invalidated_for_link_targets_only(self):
+        from . import models as entropy_models
+        entropy_settings.LINK_URL_CACHE = 'default'
+        invalidated = []
+        invalidate = entropy_models.invalidate_link_url_cache
+        entropy_models.invalidate_link_url_cache = lambda *key: invalidated.append(key)
+        self.addCleanup(setattr, entropy_models, 'invalidate_link_url_cache', invalidate)
+        # Products have no URL for a link to cache
+        self.products[0].save()
+        self.assertEqual(invalidated, [])
+        self.pages[0].save()
+        self.assertEqual(invalidated, [
+            (ContentType.objects.get_for_model(Page).pk, self.pages[0].pk)])
+
+    def test_stale_content_type(self):
+        stale = ContentType.objects.create(app_label='gone', model='gone')
+        MenuLink.objects.create(title='Stale', content_type=stale, object_id=1)
+        urls = [link.get_absolute_url()
+                for link in MenuLink.objects.prefetch_links().order_by('pk')]
+        self.assertEqual(urls[0], '/pages/%d/' % self.pages[0].pk)
+        self.assertEqual(urls[-1], None)
+
+    def test_retargeted(self):
+        link = MenuLink.objects.prefetch_links().order_by('pk')[0]
+        link.object_id = self.pages[1].pk
+        self.assertEqual(link.get_absolute_url(), '/pages/%d/' % self.pages[1].pk)
+
+    def test_url_cache(self):
+        entropy_settings.LINK_URL_CACHE = 'default'
+        list(MenuLink.objects.prefetch_links())
+        with self.assertNumQueries(1):
+            links = list(MenuLink.objects.prefetch_links().order_by('pk'))
+            self.assertEqual(
+                links[0].get_absolute_url(), '/pages/%d/' % self.pages[0].pk)
+
+        page = self.pages[0]
+        page.title = 'Changed'
+        page.save()
+        with self.assertNumQueries(2):
+            links = list(MenuLink.objects.prefetch_links().order_by('pk'))
+        page.delete()
+        link = MenuLink.objects.order_by('pk')[0]
+        self.assertEqual(link.get_absolute_url(), None)
+
+
+class ResetTest(TestCase):
+    def test_fast_reset(self):
+        Track.objects.create(name='a')
+        call_command('reset', 'entropy', interactive=False, fast=True, verbosity=0)
+        self.assertEqual(Track.objects.count(), 0)
+        Track.objects.create(name='b')
+        self.assertEqual(Track.objects.count(), 1)
+
+    def test_dependency_order(self):
+        from django.db.models import get_app
+        from .management.sql import dependency_order
+        entropy, auth = get_app('entropy'), get_app('auth')
+        # entropy's models reference auth.User, so auth is created first
+        self.assertEqual(dependency_order([entropy, auth]), [auth, entropy])
+        self.assertEqual(dependency_order([auth, entropy]), [auth, entropy])
+
+    def test_ddl_cache(self):
+        from django.db import connection
+        from django.db.models import get_app
+        from django.core.management.color import no_style
+        from .management.sql import sql_custom, sql_indexes
+
+        app = get_app('entropy')
+        expected = sql_indexes(app, no_style(), connection)
+        entropy_settings.DDL_CACHE_DIR = tempfile.mkdtemp()
+        try:
+            self.assertEqual(sql_indexes(app, no_style(), connection), expected)
+            # Custom SQL files are read every time
+            sql_custom(app, no_style(), connection)
+            name, = os.listdir(entropy_settings.DDL_CACHE_DIR)
+            with open(os.path.join(entropy_settings.DDL_CACHE_DIR, name), 'w') as fp:
+                json.dump(['-- cached'], fp)
+            self.assertEqual(sql_indexes(app, no_style(), connection), ['-- cached'])
+        finally:
+            shutil.rmtree(entropy_settings.DDL_CACHE_DIR)
+            entropy_settings.DDL_CACHE_DIR = None
+
+    def test_ddl_cache_concurrent_writers(self):
+        from django.db import connection
+        from django.db.models import get_app
+        from django.core.management.color import no_style
+        from .management.sql import sql_indexes
+
+        app = get_app('entropy')
+        expected = sql_indexes(app, no_style(), connection)
+        results, errors = [], []
+
+        def generate(start):
+            start.wait()
+            try:
+                results.append(sql_indexes(app, no_style(), connection))
+            except Exception as e:
+                errors.append(e)
+        # Switch threads as often as possible (Python 2)
+        interval = getattr(sys, 'getcheckinterval', lambda: None)()
+        if interval is not None:
+            sys.setcheckinterval(1)
+        self.addCleanup(lambda: interval and sys.setcheckinterval(interval))
+        for attempt in range(10):
+            root = tempfile.mkdtemp()
+            # Not created yet, so the writers race on the directory as well
+            entropy_settings.DDL_CACHE_DIR = os.path.join(root, 'ddl')
+            start = threading.Event()
+            threads = [threading.Thread(target=generate, args=(start,))
+                       for i in range(16)]
+            try:
+                for thread in threads:
+                    thread.start()
+                start.set()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(errors, [])
+                self.assertEqual(len(os.listdir(entropy_settings.DDL_CACHE_DIR)), 1)
+            finally:
+                shutil.rmtree(root)
+                entropy_settings.DDL_CACHE_DIR = None
+        self.assertEqual(results, [expected] * 160)
+
+    def test_snapshot_key(self):
+        from django.core.management.base import CommandError
+        from django.core.management.color import no_style
+        from django.db import connection
+        from django.db.models import get_app
+        from .management.snapshots import snapshot_key, snapshot_name
+
+        apps = [get_app('auth'), get_app('entropy')]
+        key = snapshot_key(apps, no_style(), connection)
+        self.assertEqual(snapshot_key(apps, no_style(), connection), key)
+        self.assertNotEqual(snapshot_key(apps[:1], no_style(), connection), key)
+        # The test database lives in memory
+        self.assertRaises(CommandError, snapshot_name, connection, key)
+
+    def test_snapshot_key_custom_sql(self):
+        from django.core.management.color import no_style
+        from django.db import connection
+        from django.db.models import get_app
+        from .management import snapshots
+
+        sql_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sql_dir)
+        custom_sql_dir = snapshots.custom_sql_dir
+        snapshots.custom_sql_dir = lambda app: sql_dir
+        self.addCleanup(setattr, snapshots, 'custom_sql_dir', custom_sql_dir)
+
+        apps = [get_app('entropy')]
+        path = os.path.join(sql_dir, 'track.sql')
+        with open(path, 'w') as fp:
+            fp.write("INSERT INTO entropy_track (name) VALUES ('a');\n")
+        key = snapshots.snapshot_key(apps, no_style(), connection)
+        # Touching the file keeps the key, changing its contents doesn't
+        os.utime(path, (0, 0))
+        self.assertEqual(snapshots.snapshot_key(apps, no_style(), connection), key)
+        with open(path, 'a') as fp:
+            fp.write("INSERT INTO entropy_track (name) VALUES ('b');\n")
+        self.assertNotEqual(snapshots.snapshot_key(apps, no_style(), connection), key)
+
+    def test_snapshot_name_length(self):
+        from .management.snapshots import snapshot_name
+
+        class Operations(object):
+            def max_name_length(self):
+                return 63
+
+        class PostgresConnection(object):
+            vendor = 'postgresql'
+            ops = Operations()
+            def __init__(self, name):
+                self.settings_dict = {'NAME': name}
+
+        key = '0123456789abcdef'
+        self.assertEqual(snapshot_name(PostgresConnection('app'), key),
+                         'app_snapshot_0123456789abcdef')
+        long_name = snapshot_name(PostgresConnection('a' * 40), key)
+        self.assertEqual(len(long_name), 63)
+        self.assertTrue(long_name.endswith('_snapshot_0123456789abcdef'))
+        self.assertNotEqual(snapshot_name(PostgresConnection('a' * 41), key), long_name)
+
+    def test_iter_sql_statements(self):
+        import io
+        from .management.sql import iter_sql_statements
+        sql = (u"-- seed; data\n"
+               u"INSERT INTO t VALUES ('a;b', 'it''s', \"q;\"\"x\"); SELECT 1 -- x;\n"
+               u"FROM y;\n/* c; */ CREATE FUNCTION f() AS $f$ BEGIN; END $f$;\n"
+               u"SELECT $$;$$")
+        expected = [
+            u"INSERT INTO t VALUES ('a;b', 'it''s', \"q;\"\"x\");",
+            u"SELECT 1 \nFROM y;",
+            u"CREATE FUNCTION f() AS $f$ BEGIN; END $f$;",
+            u"SELECT $$;$$;",
+        ]
+        for chunk_size in (1, 2, 3, 7, 1024):
+            self.assertEqual(
+                list(iter_sql_statements(io.StringIO(sql), chunk_size)), expected)
+
+    def test_iter_sql_statements_backslashes(self):
+        import io
+        from .management.sql import iter_sql_statements
+        cases = {
+            'mysql': [
+                u"INSERT INTO t VALUES ('it\\'s; fine', \"a\\\"; b\", 'c:\\\\');",
+                u"SELECT 1;",
+            ],
+            'postgresql': [
+                u"SELECT E'it\\'s; fine', e'c:\\\\', 'c:\\';",
+                u"SELECT 1;",
+            ],
+            # Backslashes are plain characters everywhere else
+            None: [
+                u"SELECT 'c:\\';",
+                u"SELECT 1;",
+            ],
+        }
+        for vendor, expected in cases.items():
+            sql = u' '.join(expected)
+            for chunk_size in (1, 2, 3, 7, 1024):
+                self.assertEqual(list(iter_sql_statements(
+                    io.StringIO(sql), chunk_size, vendor)), expected)
+        # Identifiers ending in e don't start E'' strings
+        self.assertEqual(list(iter_sql_statements(
+            io.StringIO(u"SELECT name'\\'; SELECT 1;"), 3, 'postgresql')),
+            [u"SELECT name'\\';", u"SELECT 1;"])
+
+
+class ResetDatabaseTest(TransactionTestCase):
+    '''
+    Resets outside a transaction, as the command runs, in two file-backed
+    SQLite databases added for the test
+    '''
+    aliases = ('reset_a', 'reset_b')
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for alias in self.aliases:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(self.dir, '%s.db' % alias),
+            }
+        self.reset(database=','.join(self.aliases))
+
+    def tearDown(self):
+        for alias in self.aliases:
+            connections[alias].close()
+            delattr(connections._connections, alias)
+            del connections.databases[alias]
+        shutil.rmtree(self.dir)
+
+    def reset(self, **options):
+        options.setdefault('database', self.aliases[0])
+        call_command('reset', 'entropy', interactive=False, verbosity=0, **options)
+
+    def names(self, alias):
+        return sorted(Track.objects.using(alias).values_list('name', flat=True))
+
+    def test_fast_reset_script(self):
+        from django.core.management.color import no_style
+        from .management.commands.reset import Command
+
+        Track.objects.using('reset_a').create(name='a')
+        self.reset(fast=True)
+        self.assertEqual(self.names('reset_a'), [])
+
+        # The script runs in a transaction of its own
+        connection = connections['reset_a']
+        self.assertFalse(connection.in_atomic_block)
+        command = Command()
+        command.style = no_style()
+        self.assertRaises(connection.Database.Error, command.execute_sql, connection, [
+            "INSERT INTO entropy_track (name, name_plural, \"order\", album) "
+            "VALUES ('b', '', 0, 0);",
+            "INSERT INTO entropy_missing VALUES (1);"], script=True)
+        self.assertEqual(self.names('reset_a'), [])
+
+    def test_parallel_reset(self):
+        for alias in self.aliases:
+            Track.objects.using(alias).create(name=alias)
+        self.reset(database=','.join(self.aliases), fast=True)
+        for alias in self.aliases:
+            self.assertEqual(self.names(alias), [])
+
+    def test_emit(self):
+        Track.objects.using('reset_a').create(name='a')
+        emit = os.path.join(self.dir, 'reset.sql')
+        self.reset(emit=emit)
+        with open(emit) as fp:
+            sql = fp.read()
+        self.assertTrue(sql.startswith('BEGIN;\n'))
+        self.assertTrue('CREATE TABLE "entropy_track"' in sql)
+        # Written instead of run
+        self.assertEqual(self.names('reset_a'), ['a'])
+
+        self.reset(database=','.join(self.aliases), emit=emit)
+        for alias in self.aliases:
+            self.assertTrue(os.path.exists('%s.%s' % (emit, alias)))
+
+    def test_snapshot(self):
+        Track.objects.using('reset_a').create(name='seed')
+        self.reset(snapshot='save')
+        Track.objects.using('reset_a').create(name='extra')
+        self.reset(snapshot='restore')
+        self.assertEqual(self.names('reset_a'), ['seed'])
+
+        # No snapshot of reset_b, so it is reset instead
+        Track.objects.using('reset_b').create(name='extra')
+        self.reset(database='reset_b', snapshot='restore')
+        self.assertEqual(self.names('reset_b'), [])
+
+
+class MigrationTest(TransactionTestCase):
+    '''
+    Applies entropy's migrations, which the test settings skip, to a
+    file-backed SQLite database added for the test
+    '''
+    alias = 'migrations'
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        connections.databases[self.alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(self.dir, 'migrations.db'),
+        }
+
+    def tearDown(self):
+        connections[self.alias].close()
+        delattr(connections._connections, self.alias)
+        del connections.databases[self.alias]
+        shutil.rmtree(self.dir)
+
+    def migrate(self, name):
+        from django.db.migrations.executor import MigrationExecutor
+        with self.settings(MIGRATION_MODULES={}):
+            executor = MigrationExecutor(connections[self.alias])
+            executor.migrate([('entropy', name)])
+
+    def schema(self):
+        '''Column names of entropy_image and the names of its indexes'''
+        with connections[self.alias].cursor() as cursor:
+            columns = set(
+                column.name for column in connections[self.alias].introspection
+                .get_table_description(cursor, 'entropy_image'))
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'entropy_image'")
+            indexes = set(row[0] for row in cursor.fetchall())
+        return columns, indexes
+
+    def test_upgrade_from_baseline(self):
+        # The schema of South's 0001, as faked by upgrading databases
+        self.migrate('0001_initial')
+        columns, indexes = self.schema()
+        self.assertFalse('_renditions' in columns)
+        self.assertFalse('entropy_image_is_icon' in indexes)
+
+        self.migrate('0003_image_renditions')
+        columns, indexes = self.schema()
+        self.assertTrue(set(['_renditions', 'rendered_at']) <= columns)
+        self.assertTrue('entropy_image_is_icon' in indexes)
+        self.assertTrue(any(name.endswith('_idx') for name in indexes))
+
+        self.migrate('0002_generic_lookup_indexes')
+        columns, indexes = self.schema()
+        self.assertFalse('_renditions' in columns)
+        self.assertTrue('entropy_image_is_icon' in indexes)
+
+        self.migrate(None)
+        self.assertFalse('entropy_image' in
+                         connections[self.alias].introspection.table_names())
@@ -0,0 +1,92 @@
+import re
+
+
+ELLIPSIS = '...'
+
+# One token at a time: a tag or comment, an entity, a run of other text,
+# a run of whitespace, or a stray '<' / '&'
+_tokens = re.compile(
+    r'<!--.*?-->|<[^<>]*>|&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);'
+    r'|[^<&\s]+|\s+|[<&]',
+    re.S | re.U)
+
+_tag = re.compile(r'<(/)?([a-zA-Z][^\s/>]*)[^>]*?(/)?>', re.S)
+
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+])
+
+
+def _track_tag(token, open_tags):
+    tag = _tag.match(token)
+    if not tag:
+        return
+    closing, name, self_closing = tag.groups()
+    name = name.lower()
+    if closing:
+        if name in open_tags:
+            # Drop it and anything left unclosed inside it
+            del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name):]
+    elif not self_closing and name not in VOID_ELEMENTS:
+        open_tags.append(name)
+
+
+def _close(text, open_tags, ellipsis):
+    return text.rstrip() + ellipsis + ''.join(
+        '</%s>' % name for name in reversed(open_tags))
+
+
+def truncate(text, words, ellipsis=ELLIPSIS):
+    '''
+    Truncate ``text`` to ``words`` words, closing any HTML tags left open.
+
+    Tokens are scanned lazily, so the work done is proportional to the
+    part of the text that is kept, not to the length of ``text``.
+    '''
+    open_tags = []
+    # Where the last kept word ended, and the tags open at that point
+    kept, kept_tags = 0, []
+    count = 0
+    in_word = False
+    for token in _tokens.finditer(text):
+        value = token.group()
+        if value[0] == '<' and len(value) > 1:
+            _track_tag(value, open_tags)
+            continue
+        if value[0].isspace():
+            in_word = False
+            continue
+        if not in_word:
+            count += 1
+            if count > words:
+                return _close(text[:kept], kept_tags, ellipsis)
+            in_word = True
+        kept, kept_tags = token.end(), open_tags[:]
+    return text
+
+
+def truncate_chars(text, characters, ellipsis=ELLIPSIS):
+    '''
+    Truncate ``text`` to ``characters`` visible characters, counting an
+    entity as one and closing any HTML tags left open.
+
+    Like ``truncate``, only the kept part of the text is scanned.
+    '''
+    open_tags = []
+    # Where the last kept text ended, and the tags open at that point
+    kept, kept_tags = 0, []
+    count = 0
+    for token in _tokens.finditer(text):
+        value = token.group()
+        if value[0] == '<' and len(value) > 1:
+            _track_tag(value, open_tags)
+            continue
+        length = 1 if value[0] == '&' and len(value) > 1 else len(value)
+        if count + length > characters:
+            if count < characters and length == len(value):
+                kept, kept_tags = token.start() + characters - count, open_tags
+            return _close(text[:kept], kept_tags, ellipsis)
+        count += length
+        kept, kept_tags = token.end(), open_tags[:]
+    return text
@@ -1,5 +1,7 @@
 # Django settings for sample project.
 
+import sys
+
 DEBUG = True
 TEMPLATE_DEBUG = DEBUG
 
@@ -126,6 +128,14 @@ INSTALLED_APPS = (
     'entropy',
 )
 
+if 'test' in sys.argv:
+    # entropy's test models are declared in entropy.tests, outside its
+    # migrations, so build the test database from the models instead;
+    # entropy.tests.MigrationTest applies the migrations themselves
+    MIGRATION_MODULES = {
+        'entropy': 'entropy.nomigrations',
+    }
+
 # A sample logging configuration. The only tangible logging
 # performed by this configuration is to send an email to
 # the site admins on every HTTP 500 error when DEBUG=False.
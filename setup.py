@@ -18,6 +18,6 @@ setup( name='django-entropy',
         'Programming Language :: Python',
     ],
     install_requires = [
-        'Django>=1.4',
+        'Django>=1.7',
     ]
 )